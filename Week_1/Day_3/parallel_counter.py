@@ -0,0 +1,143 @@
+import argparse
+import concurrent.futures
+import mmap
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from text_analyzer import counter_count
+
+# ==========================================
+# THEORY: Counting Straight from Files (Map-Reduce)
+# ==========================================
+# counter_count(text.split()) needs the whole text AND a list of every word
+# in memory (~60 bytes per word). For a corpus larger than RAM:
+#   1. mmap the file: the OS pages bytes in on demand (and drops them again),
+#      so nothing is ever read into memory up front.
+#   2. Cut it into chunks at SAFE boundaries: every cut is moved forward to
+#      the next whitespace byte, so no word is split in two. (In UTF-8 an
+#      ASCII byte never occurs inside a multi-byte character.)
+#   3. MAP: a process pool counts the chunks in parallel, each one reading its
+#      chunk in small blocks -> memory per worker = one block + its Counter.
+#   4. REDUCE: the parent merges the Counters as they arrive.
+# Only the distinct words are ever decoded, so workers count raw bytes.
+
+DEFAULT_CHUNK_SIZE = 64 << 20  # Bytes per task (many tasks -> balanced workers)
+DEFAULT_BLOCK_SIZE = 1 << 20   # Bytes a worker holds in memory at once
+WHITESPACE = b" \t\n\r\x0b\x0c"
+
+def find_boundary(data, position):
+    """First index >= position that starts a new word (len(data) at the end)."""
+    size = len(data)
+    while position < size and data[position:position + 1] not in WHITESPACE:
+        position += 1
+    return position
+
+def chunk_ranges(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """[(start, end), ...] byte ranges of 'path' that never cut a word in half."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        bounds = [0]
+        while bounds[-1] < size:
+            bounds.append(find_boundary(data, min(bounds[-1] + chunk_size, size)))
+    return list(zip(bounds, bounds[1:]))
+
+def count_chunk(path, start, end, lowercase=False, encoding="utf-8", block_size=DEFAULT_BLOCK_SIZE):
+    """
+    MAP step (runs in a worker): word counts of bytes [start, end) of 'path'.
+    Words are exactly what str.split() would produce on the decoded text.
+    """
+    raw = Counter()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = start
+        while position < end:
+            stop = find_boundary(data, min(position + block_size, end)) if position + block_size < end else end
+            raw.update(data[position:stop].split())  # Counter.update() counts in C
+            position = stop
+
+    # Decode the DISTINCT words only. str.split() also splits on whitespace that
+    # bytes.split() doesn't know (\x1c-\x1f, U+00A0...): split them again here.
+    counts = Counter()
+    for token, count in raw.items():
+        word = token.decode(encoding)
+        if lowercase:
+            word = word.lower()
+        for piece in word.split():
+            counts[piece] += count
+    return counts
+
+def parallel_count(paths, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, lowercase=False, encoding="utf-8"):
+    """
+    Word frequencies of one or more files (Counter), counted in a process pool.
+    'encoding' must be ASCII-compatible (utf-8, latin-1...).
+    """
+    tasks = [(path, start, end) for path in paths for start, end in chunk_ranges(path, chunk_size)]
+    total = Counter()
+    if not tasks:
+        return total
+    processes = min(processes or os.cpu_count() or 1, len(tasks))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(count_chunk, path, start, end, lowercase, encoding) for path, start, end in tasks]
+        # REDUCE in completion order: a finished Counter is merged (and freed) right away
+        for future in concurrent.futures.as_completed(futures):
+            total.update(future.result())
+    return total
+
+def peak_memory_mb():
+    """(this process, largest worker) peak resident memory in MB."""
+    unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes on macOS, KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return own / 1e6, children / 1e6
+
+# ==========================================
+# EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count word frequencies of large files in parallel.")
+    parser.add_argument("files", nargs="*", help="text files (default: a generated demo corpus)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_SIZE >> 20)
+    parser.add_argument("--lowercase", action="store_true")
+    parser.add_argument("--top", type=int, default=10, help="how many of the most common words to print")
+    args = parser.parse_args()
+
+    paths = args.files
+    demo_path = None
+    if not paths:
+        # Same corpus as text_analyzer.py, but on disk
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            for _ in range(100):
+                f.write("machine learning is fun data science is cool " * 10000 + "\n")
+            demo_path = f.name
+        paths = [demo_path]
+
+    try:
+        n_bytes = sum(os.path.getsize(path) for path in paths)
+        print(f"Counting {n_bytes / 1e6:.1f} MB in {len(paths)} file(s) with {args.processes} process(es)...")
+
+        start = time.perf_counter()
+        counts = parallel_count(paths, args.processes, args.chunk_mb << 20, args.lowercase)
+        elapsed = time.perf_counter() - start
+        own_mb, worker_mb = peak_memory_mb()
+
+        print(f"Words: {sum(counts.values()):,} ({len(counts):,} distinct)")
+        print(f"Time:  {elapsed:.2f}s -> {n_bytes / 1e6 / elapsed:.1f} MB/s")
+        print(f"Peak memory: parent {own_mb:.1f} MB | largest worker {worker_mb:.1f} MB")
+        for word, count in counts.most_common(args.top):
+            print(f"   {word:<20} {count:,}")
+
+        if demo_path:
+            # Validation against the in-memory version
+            with open(demo_path) as f:
+                text = f.read()
+            assert counts == counter_count(text.split())
+            print("Success: Identical to counter_count(text.split()).")
+    finally:
+        if demo_path:
+            os.remove(demo_path)
@@ -0,0 +1,301 @@
+import argparse
+import array
+import hashlib
+import heapq
+import itertools
+import math
+import operator
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from text_analyzer import counter_count
+
+# ==========================================
+# THEORY: Bounded-Memory Counting (Sketches)
+# ==========================================
+# An exact Counter needs one entry per DISTINCT word. On long-tail streams
+# (user IDs, URLs, typos) that grows without limit. Two fixed-size summaries:
+#
+# 1. COUNT-MIN SKETCH (frequency of ANY word):
+#    'depth' rows of 'width' counters; a word adds its count to one hashed
+#    counter per row, and its estimate is the MINIMUM over the rows.
+#    Collisions only ever ADD, so with N = total words:
+#        true <= estimate <= true + epsilon * N    with probability >= 1 - delta
+#    for width = ceil(e / epsilon), depth = ceil(ln(1 / delta)).
+#
+# 2. MISRA-GRIES (the heavy hitters): at most k counters. When a (k+1)-th
+#    word shows up, every counter is decreased by the smallest one and the
+#    zeros are dropped. Every word that was decremented had k others
+#    decremented with it, so:
+#        true - (N - sum of counters) / (k + 1) <= counter <= true
+#    and every word with frequency > N / (k + 1) is guaranteed to be kept.
+#
+# Both are MERGEABLE: sketches of two shards add up cell by cell, and two
+# Misra-Gries summaries are summed, then reduced back to k counters the same
+# way (Agarwal et al., "Mergeable Summaries"), with the same guarantees.
+# Hashes come from blake2b (not hash(), which differs between processes),
+# so shards counted in different processes can be merged.
+
+class CountMinSketch:
+    """Fixed-size frequency estimates (never under-estimates)."""
+    def __init__(self, width=2048, depth=5, seed=0):
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.total = 0
+        self.table = array.array('Q', bytes(8 * width * depth))  # Row-major: depth x width
+        self._key = seed.to_bytes(8, "little")
+
+    @classmethod
+    def from_error(cls, epsilon, delta, seed=0):
+        """Sized so that estimate <= true + epsilon * N with probability >= 1 - delta."""
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), seed)
+
+    def _columns(self, word):
+        # Double hashing (Kirsch-Mitzenmacher): column_i = h1 + i * h2, ONE hash per word
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=16, key=self._key).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, word, count=1):
+        self.total += count
+        for cell in self._columns(word):
+            self.table[cell] += count
+
+    def update(self, counts):
+        """Adds a {word: count} mapping (e.g. a Counter of one block of words)."""
+        table = self.table
+        for word, count in counts.items():
+            self.total += count
+            for cell in self._columns(word):
+                table[cell] += count
+
+    def estimate(self, word):
+        return min(self.table[cell] for cell in self._columns(word))
+
+    def error_bound(self):
+        """epsilon * N: the maximum over-estimate, with probability >= 1 - delta."""
+        return math.e / self.width * self.total
+
+    def merge(self, other):
+        """Adds another sketch (same width, depth and seed) into this one."""
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("can only merge sketches with the same width, depth and seed")
+        self.table = array.array('Q', map(operator.add, self.table, other.table))
+        self.total += other.total
+        return self
+
+    def nbytes(self):
+        return self.table.itemsize * len(self.table)
+
+
+class MisraGries:
+    """The (at most) k most frequent words, with counts that never over-estimate."""
+    def __init__(self, k=1000):
+        self.k = k
+        self.total = 0
+        self.counters = {}
+
+    def update(self, counts):
+        """Adds a {word: count} mapping (an exact Counter is a summary with zero error)."""
+        counters = self.counters
+        for word, count in counts.items():
+            self.total += count
+            counters[word] = counters.get(word, 0) + count
+        self._reduce()
+
+    def add(self, word, count=1):
+        self.update({word: count})
+
+    def _reduce(self):
+        """Back to k counters: subtract the (k+1)-th largest count from all, drop what hits 0."""
+        if len(self.counters) <= self.k:
+            return
+        cut = heapq.nlargest(self.k + 1, self.counters.values())[-1]
+        self.counters = {word: count - cut for word, count in self.counters.items() if count > cut}
+
+    def error_bound(self):
+        """Maximum under-estimate of any word (counted or not)."""
+        return (self.total - sum(self.counters.values())) / (self.k + 1)
+
+    def estimate(self, word):
+        return self.counters.get(word, 0)
+
+    def most_common(self, n=None):
+        return sorted(self.counters.items(), key=lambda x: (-x[1], x[0]))[:n]
+
+    def merge(self, other):
+        if self.k != other.k:
+            raise ValueError("can only merge summaries with the same k")
+        self.update(other.counters)
+        self.total += other.total - sum(other.counters.values())  # update() only added the kept part
+        return self
+
+    def nbytes(self):
+        """Approximate: the dict plus its keys (counts are small ints)."""
+        return sys.getsizeof(self.counters) + sum(sys.getsizeof(word) for word in self.counters)
+
+
+class StreamingCounter:
+    """
+    Approximate, fixed-memory replacement for counter_count() on endless streams:
+    Count-Min Sketch for any word's frequency + Misra-Gries for the top words.
+    Words are pre-aggregated per block (an exact Counter of 'block_size' words,
+    counted in C), then folded into both summaries.
+    Memory: nbytes() at rest, plus, during update(), the block Counter (up to
+    block_size distinct words) and Misra-Gries holding up to top_k + block_size
+    counters before it reduces. Smaller blocks lower that peak but aggregate
+    less, so more words are hashed into the sketch one by one (slower).
+    """
+    def __init__(self, epsilon=0.0005, delta=0.01, top_k=1000, block_size=100_000, seed=0):
+        self.sketch = CountMinSketch.from_error(epsilon, delta, seed)
+        self.heavy = MisraGries(top_k)
+        self.block_size = block_size
+
+    def update(self, words):
+        """Counts an iterable of words (a list or a lazy stream)."""
+        words = iter(words)
+        while True:
+            block = Counter(itertools.islice(words, self.block_size))
+            if not block:
+                return
+            self.sketch.update(block)
+            self.heavy.update(block)
+
+    def estimate(self, word):
+        """Upper estimate of the word's frequency (see bounds())."""
+        return self.sketch.estimate(word)
+
+    def bounds(self, word):
+        """(low, high): low is certain, high holds with probability >= 1 - delta."""
+        low = self.heavy.estimate(word)
+        high = self.sketch.estimate(word)
+        if word in self.heavy.counters:
+            high = min(high, low + self.heavy.error_bound())
+        return low, high
+
+    def most_common(self, n=10):
+        """The top-n words (from Misra-Gries) with their Count-Min estimates."""
+        candidates = [(word, self.estimate(word)) for word in self.heavy.counters]
+        return sorted(candidates, key=lambda x: (-x[1], x[0]))[:n]
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.heavy.merge(other.heavy)
+        return self
+
+    @property
+    def total(self):
+        return self.sketch.total
+
+    def nbytes(self):
+        """The two summaries between update() calls (NOT the per-block peak, see above)."""
+        return self.sketch.nbytes() + self.heavy.nbytes()
+
+
+def counter_nbytes(counts):
+    """Approximate bytes held by an exact Counter: the dict, its keys and its values."""
+    return (sys.getsizeof(counts) + sum(sys.getsizeof(word) for word in counts)
+            + sum(sys.getsizeof(count) for count in counts.values()))
+
+def traced_peak(fn, *args):
+    """(fn(*args), peak bytes allocated while it ran), measured with tracemalloc."""
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def streaming_count(words, epsilon, delta, top_k, block_size):
+    counter = StreamingCounter(epsilon, delta, top_k, block_size)
+    counter.update(words)
+    return counter
+
+def long_tail_stream(n_words, vocab_size=20_000, unique_share=0.3, seed=42):
+    """Zipfian words mixed with one-off tokens (user IDs, URLs, typos)."""
+    rng = random.Random(seed)
+    vocab = [f"word{rank}" for rank in range(vocab_size)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocab_size)))
+    words = rng.choices(vocab, cum_weights=cum_weights, k=n_words)
+    for i in range(n_words):
+        if rng.random() < unique_share:
+            words[i] = rng.choice(("user_", "https://site.com/p/", "typo_")) + str(rng.getrandbits(40))
+    return words
+
+# ==========================================
+# EXECUTION: accuracy + memory vs. the exact Counter
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare StreamingCounter with the exact Counter.")
+    parser.add_argument("--words", type=int, default=2_000_000)
+    parser.add_argument("--epsilon", type=float, default=0.0005)
+    parser.add_argument("--delta", type=float, default=0.01)
+    parser.add_argument("--top-k", type=int, default=1000, help="Misra-Gries counters")
+    parser.add_argument("--block-size", type=int, default=100_000, help="words pre-aggregated per block")
+    parser.add_argument("--shards", type=int, default=4, help="shards for the merge check")
+    args = parser.parse_args()
+
+    print(f"Generating a long-tail stream of {args.words:,} words...")
+    words = long_tail_stream(args.words)
+
+    counter_args = (words, args.epsilon, args.delta, args.top_k, args.block_size)
+    start = time.perf_counter()
+    exact = counter_count(words)
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    approx = streaming_count(*counter_args)
+    approx_time = time.perf_counter() - start
+
+    # Memory = PEAK traced allocations of a second, untimed run (tracemalloc slows
+    # Python down), so the streaming side includes its block Counter and Misra-Gries growth.
+    # The word strings already belong to 'words', so neither peak counts them
+    _, exact_peak = traced_peak(counter_count, words)
+    _, approx_peak = traced_peak(streaming_count, *counter_args)
+
+    print(f"\n{'':<18} | {'Peak memory':>11} | {'Time':>7}")
+    print("-" * 43)
+    print(f"{'Counter (exact)':<18} | {exact_peak / 1e6:>8.2f} MB | {exact_time:>6.2f}s"
+          f"   ({len(exact):,} distinct words, {counter_nbytes(exact) / 1e6:.2f} MB with their strings)")
+    print(f"{'StreamingCounter':<18} | {approx_peak / 1e6:>8.2f} MB | {approx_time:>6.2f}s"
+          f"   (sketch {approx.sketch.depth} x {approx.sketch.width}, k = {args.top_k}, "
+          f"block = {args.block_size:,}, {approx.nbytes() / 1e6:.2f} MB between blocks)")
+
+    # 1. Count-Min accuracy on a sample of words (frequent ones and one-offs)
+    sample = random.Random(0).sample(sorted(exact), min(20_000, len(exact)))
+    errors = [approx.estimate(word) - exact[word] for word in sample]
+    bound = approx.sketch.error_bound()
+    print(f"\nCount-Min error over {len(sample):,} words: mean {sum(errors) / len(errors):.2f} | "
+          f"max {max(errors)} | bound epsilon*N = {bound:.0f} "
+          f"(exceeded by {sum(e > bound for e in errors) / len(errors):.2%}, allowed {args.delta:.0%})")
+    assert min(errors) >= 0, "Count-Min must never under-estimate"
+
+    # 2. Heavy hitters: recall of the true top-N and Misra-Gries' guarantee
+    for n in (10, 100):
+        true_top = {word for word, _ in exact.most_common(n)}
+        found = {word for word, _ in approx.most_common(n)}
+        print(f"Top-{n:<4} recall: {len(true_top & found) / n:.0%}")
+    mg_bound = approx.heavy.error_bound()
+    assert all(exact[word] - mg_bound <= count <= exact[word] for word, count in approx.heavy.counters.items())
+    threshold = approx.total / (args.top_k + 1)
+    assert all(word in approx.heavy.counters for word, count in exact.items() if count > threshold)
+    print(f"Misra-Gries: every word above N/(k+1) = {threshold:.0f} kept, under-estimate <= {mg_bound:.0f}")
+
+    # 3. Mergeable: shards counted separately give the same sketch as one pass
+    shards = [StreamingCounter(args.epsilon, args.delta, args.top_k, args.block_size) for _ in range(args.shards)]
+    size = -(-len(words) // args.shards)
+    for i, shard in enumerate(shards):
+        shard.update(words[i * size:(i + 1) * size])
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(shard)
+    assert merged.sketch.table == approx.sketch.table
+    merged_bound = merged.heavy.error_bound()
+    assert all(exact[word] - merged_bound <= count <= exact[word] for word, count in merged.heavy.counters.items())
+    print(f"Merged {args.shards} shards: identical sketch, Misra-Gries bound {merged_bound:.0f} still holds")
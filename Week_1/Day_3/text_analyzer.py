@@ -19,24 +19,28 @@ def counter_count(words):
     """
     return Counter(words)
 
-# 1. Simulate a large text corpus (e.g., repeating a sentence 1 million times)
-text = "machine learning is fun data science is cool " * 1000000
-words = text.split()
+# ==========================================
+# EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    # 1. Simulate a large text corpus (e.g., repeating a sentence 1 million times)
+    text = "machine learning is fun data science is cool " * 1000000
+    words = text.split()
 
-print(f"Processing {len(words)} words...")
+    print(f"Processing {len(words)} words...")
 
-# 2. Benchmark Method A: Manual Loop
-start = time.time()
-manual_res = manual_count(words)
-end = time.time()
-print(f"Manual Dict Time: {end - start:.4f} seconds")
+    # 2. Benchmark Method A: Manual Loop
+    start = time.time()
+    manual_res = manual_count(words)
+    end = time.time()
+    print(f"Manual Dict Time: {end - start:.4f} seconds")
 
-# 3. Benchmark Method B: Collections.Counter
-start = time.time()
-counter_res = counter_count(words)
-end = time.time()
-print(f"Counter Time:     {end - start:.4f} seconds")
+    # 3. Benchmark Method B: Collections.Counter
+    start = time.time()
+    counter_res = counter_count(words)
+    end = time.time()
+    print(f"Counter Time:     {end - start:.4f} seconds")
 
-# 4. Validation
-assert manual_res == counter_res
-print("Success: Both methods returned identical counts.")
\ No newline at end of file
+    # 4. Validation
+    assert manual_res == counter_res
+    print("Success: Both methods returned identical counts.")
\ No newline at end of file
@@ -0,0 +1,192 @@
+import argparse
+import itertools
+import time
+from collections import Counter
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ngrams import generate_ngrams_sliding_window
+
+# ---------------------------------------------------------
+# THEORY: Integer N-Grams (Ids + Rolling Hashes)
+# " ".join(words[i:i+n]) builds a NEW list AND a new string for every window.
+# Instead:
+#   1. Intern each word ONCE -> an array of integer ids (uint32).
+#   2. VIEWS: sliding_window_view(ids, n) is an (len-n+1, n) array that
+#      shares memory with 'ids' -> every n-gram for free (zero copy).
+#   3. HASHES (for counting): one 64-bit number per n-gram, position
+#      independent, so equal n-grams always get equal hashes:
+#          h(w1..wn) = (w1+1)*B^(n-1) + ... + (wn+1)    (mod 2^64)
+#      uint64 arithmetic wraps mod 2^64 by itself, and the (n+1)-grams follow
+#      from the n-grams with ONE vectorized step:
+#          h_{n+1}[i] = h_n[i] * B + (ids[i+n] + 1)
+#      so every n in a range costs one multiply-add over the array.
+#   4. STREAMING: ids arrive in blocks; the last (max_n - 1) ids are carried
+#      into the next block so windows across the boundary are not lost (and
+#      never counted twice).
+# Two different n-grams share a hash with probability ~1 / 2^64 per pair
+# (~m^2 / 2^65 for m distinct n-grams: negligible below billions).
+# ---------------------------------------------------------
+
+HASH_BASE = np.uint64(0x100000001B3)  # Odd 64-bit multiplier (the FNV prime)
+DEFAULT_BLOCK_SIZE = 1 << 20          # Words per block when streaming
+
+def encode(words, vocab=None):
+    """
+    Interns words -> (uint32 id array, vocab). vocab is a word -> id dict,
+    extended in place: pass the same one for every block of a stream.
+    list(vocab) maps ids back to words (dicts keep insertion order).
+    """
+    if vocab is None:
+        vocab = {}
+    ids = np.fromiter((vocab.setdefault(word, len(vocab)) for word in words), dtype=np.uint32)
+    return ids, vocab
+
+def iter_id_blocks(words, vocab, block_size=DEFAULT_BLOCK_SIZE):
+    """Encodes an iterable of words (e.g. a lazy file reader) block by block."""
+    words = iter(words)
+    while True:
+        ids, _ = encode(itertools.islice(words, block_size), vocab)
+        if len(ids) == 0:
+            return
+        yield ids
+
+def ngram_views(ids, n):
+    """Every n-gram of 'ids' as the rows of ONE zero-copy (len-n+1, n) view."""
+    if len(ids) < n:
+        return np.empty((0, n), dtype=ids.dtype)
+    return sliding_window_view(ids, n)
+
+def ngram_hashes(ids, ns):
+    """{n: uint64 array of the hash of every n-gram of 'ids'} for all n in 'ns', in one pass."""
+    ns = sorted(set(ns))
+    if not ns or ns[0] < 1:
+        raise ValueError("n-gram sizes must be >= 1")
+    shifted = ids.astype(np.uint64) + np.uint64(1)  # +1: id 0 must still change the hash
+    hashes, out = shifted, {}
+    for n in range(1, ns[-1] + 1):
+        if n > 1:
+            hashes = hashes[:-1] * HASH_BASE + shifted[n - 1:]
+        if n in ns:
+            out[n] = hashes
+    return out
+
+def stream_ngrams(id_blocks, ns, as_hashes=True):
+    """
+    Yields {n: n-grams} per block of a stream of id arrays: uint64 hashes
+    (as_hashes=True) or zero-copy (count, n) views. Every n-gram of the
+    concatenated stream comes out exactly once, in order.
+    """
+    ns = sorted(set(ns))
+    for buffer, carried in _iter_buffers(id_blocks, ns[-1]):
+        grams = ngram_hashes(buffer, ns) if as_hashes else {n: ngram_views(buffer, n) for n in ns}
+        yield {n: grams[n][_first_new(carried, n):] for n in ns}
+
+def _iter_buffers(id_blocks, max_n):
+    """(buffer, carried): each block prefixed with the last (max_n - 1) ids seen before it."""
+    tail = np.empty(0, dtype=np.uint32)
+    for block in id_blocks:
+        buffer = np.concatenate((tail, block))
+        yield buffer, len(tail)
+        tail = buffer[len(buffer) - min(len(buffer), max_n - 1):]
+
+def _first_new(carried, n):
+    """First window of a buffer not emitted with the previous one (those fit in the carried ids)."""
+    return max(0, carried - n + 1)
+
+def ngram_strings(ids, n, words):
+    """The n-grams as strings, identical to generate_ngrams_sliding_window(). words: id -> word list."""
+    lookup = np.array(words, dtype=object)
+    return list(map(" ".join, lookup[ngram_views(ids, n)].tolist()))
+
+
+class NgramCounter:
+    """
+    Counts n-grams of several sizes in ONE pass over a stream of id blocks.
+    Counts are keyed by 64-bit hash; the ids of each distinct n-gram are kept
+    once (first occurrence) so results can be turned back into strings.
+    """
+    def __init__(self, ns):
+        self.ns = sorted(set(ns))
+        self.counts = {n: Counter() for n in self.ns}  # n -> {hash: count}
+        self.grams = {n: {} for n in self.ns}          # n -> {hash: tuple of ids}
+
+    def update(self, id_blocks):
+        for buffer, carried in _iter_buffers(id_blocks, self.ns[-1]):
+            hashes = ngram_hashes(buffer, self.ns)
+            for n in self.ns:
+                skip = _first_new(carried, n)
+                # Aggregate the block in C, then touch each DISTINCT n-gram once
+                unique, first, counts = np.unique(hashes[n][skip:], return_index=True, return_counts=True)
+                self.counts[n].update(dict(zip(unique.tolist(), counts.tolist())))
+                grams, views = self.grams[n], ngram_views(buffer, n)
+                for h, i in zip(unique.tolist(), first.tolist()):
+                    if h not in grams:
+                        grams[h] = tuple(views[skip + i].tolist())
+        return self
+
+    def count(self, gram_ids):
+        """Occurrences of one n-gram, given as a sequence of ids."""
+        gram_ids = np.asarray(gram_ids, dtype=np.uint32)
+        h = ngram_hashes(gram_ids, [len(gram_ids)])[len(gram_ids)]
+        return self.counts[len(gram_ids)].get(int(h[0]), 0)
+
+    def to_strings(self, n, words):
+        """Counter of "w1 ... wn" -> count, identical to Counter(generate_ngrams_sliding_window(...))."""
+        return Counter({" ".join(words[i] for i in self.grams[n][h]): c for h, c in self.counts[n].items()})
+
+    def most_common(self, n, k, words):
+        top = sorted(self.counts[n].items(), key=lambda x: (-x[1], self.grams[n][x[0]]))[:k]
+        return [(" ".join(words[i] for i in self.grams[n][h]), c) for h, c in top]
+
+# --- Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Integer n-grams vs. string n-grams.")
+    parser.add_argument("--repeat", type=int, default=10000, help="copies of the demo sentence")
+    parser.add_argument("--min-n", type=int, default=1)
+    parser.add_argument("--max-n", type=int, default=3)
+    parser.add_argument("--block-size", type=int, default=100_000, help="words per streamed block")
+    args = parser.parse_args()
+    ns = range(args.min_n, args.max_n + 1)
+
+    text = "machine learning is the study of computer algorithms that improve automatically through experience " * args.repeat
+    words = text.split()
+    print(f"Processing {len(words)} words for n = {args.min_n}..{args.max_n}...")
+
+    # 1. Generation: strings vs. ids (views / hashes)
+    start = time.perf_counter()
+    string_grams = {n: generate_ngrams_sliding_window(words, n) for n in ns}
+    print(f"Strings (slice + join):     {time.perf_counter() - start:.4f} seconds")
+
+    start = time.perf_counter()
+    ids, vocab = encode(words)
+    print(f"Encode to ids (once):       {time.perf_counter() - start:.4f} seconds")
+
+    start = time.perf_counter()
+    views = {n: ngram_views(ids, n) for n in ns}
+    print(f"Zero-copy views:            {time.perf_counter() - start:.4f} seconds")
+
+    start = time.perf_counter()
+    hashes = ngram_hashes(ids, ns)
+    print(f"64-bit hashes (one pass):   {time.perf_counter() - start:.4f} seconds")
+
+    # 2. Counting: Counter of strings vs. streamed NgramCounter
+    start = time.perf_counter()
+    string_counts = {n: Counter(grams) for n, grams in string_grams.items()}
+    print(f"\nCount strings (Counter):    {time.perf_counter() - start:.4f} seconds")
+
+    start = time.perf_counter()
+    stream_vocab = {}
+    counter = NgramCounter(ns).update(iter_id_blocks(words, stream_vocab, args.block_size))
+    print(f"Count hashes (streamed):    {time.perf_counter() - start:.4f} seconds")
+
+    # Validation: same n-grams, same counts
+    id_to_word = list(vocab)
+    for n in ns:
+        assert ngram_strings(ids, n, id_to_word) == string_grams[n]
+        streamed = np.concatenate([block[n] for block in stream_ngrams(iter_id_blocks(words, {}, args.block_size), ns)])
+        assert np.array_equal(streamed, hashes[n])
+        assert counter.to_strings(n, list(stream_vocab)) == string_counts[n]
+    print(f"\nMost common {args.max_n}-grams: {counter.most_common(args.max_n, 3, list(stream_vocab))}")
+    print("Success: Integer n-grams match the string n-grams exactly.")
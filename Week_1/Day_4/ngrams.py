@@ -38,24 +38,25 @@ def generate_ngrams_sliding_window(words, n):
     return output
 
 # --- Execution ---
-text = "machine learning is the study of computer algorithms that improve automatically through experience " * 10000
-words = text.split()
-N = 3
-
-print(f"Processing {len(words)} words for {N}-grams...")
-
-# Measure Naive
-start = time.time()
-naive_result = generate_ngrams_naive(words, N)
-end = time.time()
-print(f"Naive Method:   {end - start:.4f} seconds")
-
-# Measure Sliding Window
-start = time.time()
-window_result = generate_ngrams_sliding_window(words, N)
-end = time.time()
-print(f"Sliding Window: {end - start:.4f} seconds")
-
-# Validation
-assert naive_result == window_result
-print("\nSuccess: Both methods produced the same output.")
\ No newline at end of file
+if __name__ == "__main__":
+    text = "machine learning is the study of computer algorithms that improve automatically through experience " * 10000
+    words = text.split()
+    N = 3
+
+    print(f"Processing {len(words)} words for {N}-grams...")
+
+    # Measure Naive
+    start = time.time()
+    naive_result = generate_ngrams_naive(words, N)
+    end = time.time()
+    print(f"Naive Method:   {end - start:.4f} seconds")
+
+    # Measure Sliding Window
+    start = time.time()
+    window_result = generate_ngrams_sliding_window(words, N)
+    end = time.time()
+    print(f"Sliding Window: {end - start:.4f} seconds")
+
+    # Validation
+    assert naive_result == window_result
+    print("\nSuccess: Both methods produced the same output.")
\ No newline at end of file
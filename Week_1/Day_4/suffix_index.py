@@ -0,0 +1,233 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+from ngram_engine import encode
+from ngrams import generate_ngrams_sliding_window
+
+# ---------------------------------------------------------
+# THEORY: Suffix Array (+ LCP) over Word Ids
+# Counting one phrase with n-grams means generating and counting EVERY
+# n-gram of the text. A suffix array answers any phrase, of any length:
+#   SA  = the start positions of all suffixes, sorted lexicographically.
+#   All occurrences of a phrase are suffixes that START with it, so they
+#   form ONE contiguous range of SA -> 2 binary searches, O(m log n).
+#   count = size of the range, positions = the SA entries in it.
+#   LCP[i] = length of the common prefix of suffixes SA[i-1] and SA[i]:
+#   its maximum is the longest phrase that occurs at least twice.
+#
+# BUILD (prefix doubling, vectorized in numpy): rank every suffix by its
+# first 1, 2, 4, 8... tokens. Ranks for 2k tokens = sort by the pair
+# (rank of the first k, rank of the next k), as a RADIX sort in O(n):
+#   - the order by the SECOND rank is free: it is the previous round's
+#     order, shifted back by k (suffixes with nothing k tokens ahead first),
+#   - a stable counting sort by the FIRST rank then finishes the pair
+#     (numpy's stable sort of 16-bit keys is a counting sort, so ranks go
+#     through as 2 passes of 16-bit digits).
+# It stops as soon as all ranks are distinct, i.e. after ~log2(longest
+# repeat) rounds: O(n log(longest repeat)) in total, a handful of rounds
+# on real text (only the initial np.unique over the ids is O(n log n)).
+# LCP comes from the same rank arrays: two suffixes share their next 2^j
+# tokens iff their round-j ranks are equal, so every LCP is found at once
+# by trying 2^j, 2^(j-1)... 1 (binary lifting, no Python loop per suffix).
+#
+# STORAGE: plain .npy arrays (ids uint32, SA/LCP int32 when they fit) and
+# a vocab.txt. load() memory-maps them: nothing is read up front and the
+# OS pages in only what the binary searches touch.
+# ---------------------------------------------------------
+
+def _counting_argsort(rank, order):
+    """'order' stably re-sorted by rank[order]: LSD radix sort, one O(n) counting pass per 16-bit digit."""
+    keys = rank[order].astype(np.int64)
+    shift = 0
+    while True:
+        order = order[np.argsort(((keys >> shift) & 0xFFFF).astype(np.uint16), kind="stable")]
+        shift += 16
+        if (int(keys.max()) >> shift) == 0:
+            return order
+        keys = rank[order].astype(np.int64)
+
+
+def build_suffix_array(ids):
+    """(SA, LCP) of an id array. LCP[0] = 0, LCP[i] = lcp(SA[i-1], SA[i])."""
+    n = len(ids)
+    index_type = np.int32 if n < 2**31 else np.int64
+    if n == 0:
+        return np.empty(0, dtype=index_type), np.empty(0, dtype=index_type)
+
+    # Round 0: rank = the token itself (dense ranks 0..distinct-1)
+    _, rank = np.unique(ids, return_inverse=True)
+    rank = rank.astype(index_type)
+    ranks = [rank]  # ranks[j] orders the first 2^j tokens of every suffix
+    sa = _counting_argsort(rank, np.arange(n, dtype=index_type))
+    step = 1
+    while rank.max() < n - 1:
+        second = np.full(n, -1, dtype=np.int64)  # -1: the suffix ends before the next k tokens
+        second[:n - step] = rank[step:]
+        # Sorted by the second rank: the suffixes ending first, then the previous order shifted by step
+        by_second = np.concatenate((np.arange(n - step, n, dtype=index_type), sa[sa >= step] - step))
+        sa = _counting_argsort(rank, by_second)
+        first, following = rank[sa], second[sa]
+        new_group = (first[1:] != first[:-1]) | (following[1:] != following[:-1])
+        rank = np.empty(n, dtype=index_type)
+        rank[sa] = np.concatenate(([0], np.cumsum(new_group)))
+        ranks.append(rank)
+        step *= 2
+
+    # LCP by binary lifting: lcp < 2^(rounds) since the last ranks are all distinct
+    left, right = sa[:-1].astype(np.int64), sa[1:].astype(np.int64)
+    common = np.zeros(n - 1, dtype=np.int64)
+    for j in range(len(ranks) - 2, -1, -1):
+        a, b = left + common, right + common
+        inside = (a < n) & (b < n)
+        a, b = np.where(inside, a, 0), np.where(inside, b, 0)
+        common += (inside & (ranks[j][a] == ranks[j][b])) << j
+    lcp = np.concatenate(([0], common)).astype(index_type)
+    return sa, lcp
+
+
+class SuffixIndex:
+    """Phrase counts / positions over an id-encoded corpus, via suffix array + LCP."""
+    def __init__(self, corpus, sa, lcp, words):
+        self.corpus = corpus  # uint32 word ids (token positions = indexes into this)
+        self.sa = sa
+        self.lcp = lcp
+        self.words = words    # id -> word
+        self.vocab = {word: i for i, word in enumerate(words)}
+
+    @classmethod
+    def build(cls, words):
+        """Index a list of words (e.g. text.split())."""
+        ids, vocab = encode(words)
+        return cls(ids, *build_suffix_array(ids), list(vocab))
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ("corpus", "sa", "lcp"):
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "vocab.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.words))  # Words come from split(): never contain a newline
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        mode = "r" if mmap else None
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in ("corpus", "sa", "lcp")]
+        with open(os.path.join(directory, "vocab.txt"), encoding="utf-8") as f:
+            text = f.read()
+        return cls(*arrays, text.split("\n") if text else [])
+
+    def phrase_ids(self, phrase):
+        """A phrase ("w1 w2 ..." or a list of words) as ids; None if a word was never seen."""
+        words = phrase.split() if isinstance(phrase, str) else phrase
+        ids = [self.vocab.get(word) for word in words]
+        return None if None in ids else ids
+
+    def _bounds(self, pattern):
+        """SA range [lo, hi) of the suffixes starting with 'pattern' (a list of ids)."""
+        m, corpus, sa = len(pattern), self.corpus, self.sa
+
+        def prefix(i):  # First m tokens of the i-th smallest suffix (shorter at the end of the text)
+            start = int(sa[i])
+            return corpus[start:start + m].tolist()
+
+        lo, hi = 0, len(sa)
+        while lo < hi:  # First suffix >= pattern
+            mid = (lo + hi) // 2
+            if prefix(mid) < pattern:
+                lo = mid + 1
+            else:
+                hi = mid
+        first, hi = lo, len(sa)
+        while lo < hi:  # First suffix whose prefix > pattern
+            mid = (lo + hi) // 2
+            if prefix(mid) <= pattern:
+                lo = mid + 1
+            else:
+                hi = mid
+        return first, lo
+
+    def count(self, phrase):
+        """How often the phrase occurs (any length, 0 for unknown words)."""
+        pattern = self.phrase_ids(phrase)
+        if not pattern:
+            return 0
+        lo, hi = self._bounds(pattern)
+        return hi - lo
+
+    def positions(self, phrase):
+        """Sorted token positions where the phrase starts."""
+        pattern = self.phrase_ids(phrase)
+        if not pattern:
+            return np.empty(0, dtype=np.int64)
+        lo, hi = self._bounds(pattern)
+        return np.sort(np.asarray(self.sa[lo:hi], dtype=np.int64))
+
+    def longest_repeat(self):
+        """(phrase, positions) of the longest phrase occurring at least twice (None if none)."""
+        if len(self.lcp) == 0 or int(self.lcp.max()) == 0:
+            return None
+        i = int(np.argmax(self.lcp))
+        start, length = int(self.sa[i]), int(self.lcp[i])
+        phrase = " ".join(self.words[w] for w in self.corpus[start:start + length].tolist())
+        return phrase, self.positions(phrase)
+
+    def nbytes(self):
+        return self.corpus.nbytes + self.sa.nbytes + self.lcp.nbytes
+
+# --- Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Suffix-array phrase queries vs. regenerating n-grams.")
+    parser.add_argument("--words", type=int, default=500_000, help="corpus size in words")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    # A repetitive base sentence mixed with random words (long repeats + a real vocabulary)
+    rng = random.Random(42)
+    base = "machine learning is the study of computer algorithms that improve automatically through experience".split()
+    extra = [f"w{i}" for i in range(5000)]
+    words = [base[i % len(base)] if rng.random() < 0.7 else rng.choice(extra) for i in range(args.words)]
+    print(f"Indexing {len(words):,} words...")
+
+    start = time.perf_counter()
+    index = SuffixIndex.build(words)
+    print(f"Build (SA + LCP):      {time.perf_counter() - start:.3f} seconds ({index.nbytes() / 1e6:.1f} MB)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        index.save(directory)
+        start = time.perf_counter()
+        mapped = SuffixIndex.load(directory)
+        print(f"Load (memory-mapped):  {time.perf_counter() - start:.3f} seconds")
+
+        # Random phrases of length 1-6 taken from the corpus (plus some that never occur)
+        queries = []
+        for _ in range(args.queries):
+            n, i = rng.randint(1, 6), rng.randrange(len(words) - 6)
+            queries.append(" ".join(words[i:i + n]) if rng.random() < 0.9 else f"w1 w2 {base[0]}")
+
+        start = time.perf_counter()
+        counts = [mapped.count(q) for q in queries]
+        elapsed = time.perf_counter() - start
+        print(f"Suffix array:          {elapsed / len(queries) * 1e6:.1f} us per phrase count")
+
+        start = time.perf_counter()
+        ngram_counts = {n: Counter(generate_ngrams_sliding_window(words, n)) for n in range(1, 7)}
+        print(f"Counting every n-gram: {time.perf_counter() - start:.3f} seconds (n = 1..6, needed up front)")
+
+        # Validation against the n-gram counts and a linear scan
+        for query, count in zip(queries, counts):
+            assert count == ngram_counts[len(query.split())][query]
+        query = queries[0].split()
+        expected = [i for i in range(len(words) - len(query) + 1) if words[i:i + len(query)] == query]
+        assert mapped.positions(query).tolist() == expected
+
+        phrase, positions = mapped.longest_repeat()
+        print(f"\nLongest repeated phrase ({len(phrase.split())} words, {len(positions)}x): "
+              f"'{' '.join(phrase.split()[:8])} ...'")
+        print(f"'{query[0]}' occurs {mapped.count(query[0]):,} times, first at {mapped.positions(query[0])[:5].tolist()}")
+        del mapped  # Release the memory maps before the directory is removed
+        print("Success: Phrase counts match the n-gram counts.")
@@ -0,0 +1,189 @@
+import argparse
+import concurrent.futures
+import os
+import random
+import string
+import time
+
+import numpy as np
+
+from edit_distance import MyersPattern
+from text_intelligence import levenshtein_distance
+
+# ==========================================
+# THEORY: One Query vs. Many Candidates (Vectorized DP)
+# ==========================================
+# Spell checking = the SAME query against every dictionary word. Instead of
+# one Python DP per word, all candidates of similar length are stacked into
+# ONE (B, L) array of character codes (padded to the longest one) and each
+# DP row is computed for all B candidates at once:
+#   substitute / delete:  T[j] = min(D_prev[j-1] + (q_i != c_j), D_prev[j] + 1)
+#   insert:               D[j] = min(T[j], D[j-1] + 1)
+# The insert chain looks sequential, but unrolled it is
+#   D[j] = min over t <= j of (T[t] + j - t) = cummin(T - j) + j
+# -> np.minimum.accumulate: a whole row in a few array operations, no loop
+# over columns. Padding never changes a result: column j only depends on
+# columns <= j, and each candidate's distance is read at its own length.
+#
+# With max_dist = k, candidates are dropped as soon as they MUST exceed k:
+#   - |len(query) - len(word)| > k before any work (whole buckets skipped),
+#   - after each row, when every cell + the length gap still ahead is > k.
+# Buckets are independent, so large dictionaries are spread over a thread
+# pool (numpy releases the GIL inside its array operations).
+
+PAD = np.uint32(0xFFFFFFFF)  # Not a Unicode code point: never equals a query character
+PARALLEL_MIN_WORDS = 20_000  # Below this, a thread pool costs more than it saves
+
+def encode_words(words, width):
+    """(len(words), width) uint32 array of code points, padded with PAD."""
+    codes = np.frombuffer("".join(word.ljust(width, "\0") for word in words).encode("utf-32-le"), dtype="<u4")
+    codes = codes.reshape(len(words), width).copy()
+    lengths = np.fromiter(map(len, words), dtype=np.int32, count=len(words))
+    codes[np.arange(width) >= lengths[:, None]] = PAD
+    return codes, lengths
+
+
+class BatchEditDistance:
+    """
+    A dictionary prepared for one-to-many edit distance: words are grouped
+    into length buckets ('bucket_width' lengths per padded array) ONCE, then
+    every query is computed against all of them in vectorized DP rows.
+    """
+    def __init__(self, words, bucket_width=2, workers=None):
+        self.words = list(words)
+        self.workers = workers or os.cpu_count() or 1
+        by_bucket = {}
+        for index, word in enumerate(self.words):
+            by_bucket.setdefault(len(word) // bucket_width, []).append(index)
+        # Each bucket: (indexes into self.words, codes (B, L), lengths (B,))
+        self.buckets = []
+        for key in sorted(by_bucket):
+            indexes = np.array(by_bucket[key], dtype=np.int64)
+            members = [self.words[i] for i in indexes]
+            codes, lengths = encode_words(members, max(map(len, members)))
+            self.buckets.append((indexes, codes, lengths))
+
+    def distances(self, query, max_dist=None):
+        """
+        Distance from 'query' to every word (array in dictionary order).
+        With max_dist, words farther than max_dist get max_dist + 1.
+        """
+        result = np.full(len(self.words), -1 if max_dist is None else max_dist + 1, dtype=np.int32)
+        query_codes = np.frombuffer(query.encode("utf-32-le"), dtype="<u4")
+        tasks = [bucket for bucket in self.buckets
+                 if max_dist is None or self._may_match(bucket[2], len(query), max_dist)]
+
+        def run(bucket):
+            indexes, found = _bucket_distances(query_codes, *bucket, max_dist)
+            result[indexes] = found  # Buckets never share an index: no lock needed
+
+        if self.workers > 1 and sum(len(b[0]) for b in tasks) >= PARALLEL_MIN_WORDS:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(run, tasks))
+        else:
+            for bucket in tasks:
+                run(bucket)
+        return result
+
+    def search(self, query, max_dist):
+        """[(word, distance)] of every word within max_dist, closest first (then dictionary order)."""
+        found = self.distances(query, max_dist)
+        hits = np.flatnonzero(found <= max_dist)
+        hits = hits[np.argsort(found[hits], kind="stable")]
+        return [(self.words[i], int(found[i])) for i in hits]
+
+    @staticmethod
+    def _may_match(lengths, query_length, max_dist):
+        return int(lengths.min()) - max_dist <= query_length <= int(lengths.max()) + max_dist
+
+
+def _bucket_distances(query, indexes, codes, lengths, max_dist=None):
+    """(indexes, distances) of one bucket; with max_dist, only the candidates that got through."""
+    m = len(query)
+    if max_dist is not None:
+        keep = np.abs(lengths - m) <= max_dist
+        indexes, codes, lengths = indexes[keep], codes[keep], lengths[keep]
+    count, width = codes.shape
+    # Distances never exceed max(m, width): small ints halve the memory traffic
+    dtype = np.int16 if max(m, width) < 2**12 else np.int32
+    columns = np.arange(width + 1, dtype=dtype)
+    row = np.tile(columns, (count, 1))  # D[0][j] = j
+    if max_dist is not None:
+        # Characters of the word still ahead of each column (past the word: "infinitely" far)
+        ahead = (lengths[:, None] - columns).astype(dtype)
+        ahead[ahead < 0] = np.iinfo(dtype).max // 2
+    for i in range(1, m + 1):
+        if len(row) == 0:
+            break
+        best = np.empty_like(row)
+        best[:, 0] = i
+        np.minimum(row[:, :-1] + (codes != query[i - 1]), row[:, 1:] + 1, out=best[:, 1:])
+        row = np.minimum.accumulate(best - columns, axis=1) + columns
+        if max_dist is not None:
+            # Lower bound through each cell: its cost + the length gap still ahead
+            keep = (row + np.abs(ahead - (m - i))).min(axis=1) <= max_dist
+            if not keep.all():
+                indexes, codes, lengths, row, ahead = (indexes[keep], codes[keep], lengths[keep],
+                                                       row[keep], ahead[keep])
+    return indexes, row[np.arange(len(row)), lengths]
+
+# ==========================================
+# EXECUTION & BENCHMARK
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="One query vs. a whole dictionary: loop vs. vectorized batch.")
+    parser.add_argument("--words", type=int, default=100_000, help="dictionary size")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--max-dist", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--baseline-words", type=int, default=5_000,
+                        help="words checked by the original loop (its time is scaled up to the full dictionary)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    letters = string.ascii_lowercase
+    dictionary = ["".join(rng.choices(letters, k=min(3 + int(rng.expovariate(1 / 5)), 25))) for _ in range(args.words)]
+    def typo(word):
+        i = rng.randrange(len(word))
+        return word[:i] + rng.choice(letters) + word[i + 1:]
+    queries = [typo(rng.choice(dictionary)) for _ in range(args.queries)]
+    k = args.max_dist
+
+    start = time.perf_counter()
+    batch = BatchEditDistance(dictionary, workers=args.workers)
+    print(f"Prepared {len(dictionary):,} words in {len(batch.buckets)} buckets: {time.perf_counter() - start:.3f}s")
+
+    # 1. The original spell checker loop (on a sample, scaled up)
+    sample = dictionary[:args.baseline_words]
+    start = time.perf_counter()
+    slow = [word for word in sample if levenshtein_distance(queries[0], word) <= k]
+    loop_time = (time.perf_counter() - start) * len(dictionary) / len(sample)
+    print(f"\n{'Method':<34} | Time per query")
+    print("-" * 52)
+    print(f"{'Loop of levenshtein_distance()':<34} | {loop_time * 1e3:>9.1f} ms (scaled from {len(sample):,} words)")
+
+    # 2. Bit-parallel loop with cut-off (edit_distance.py)
+    start = time.perf_counter()
+    for query in queries:
+        pattern = MyersPattern(query)
+        myers = [word for word in dictionary if pattern.distance(word, k) <= k]
+    print(f"{'Loop of MyersPattern (max_dist)':<34} | {(time.perf_counter() - start) / len(queries) * 1e3:>9.1f} ms")
+
+    # 3. Vectorized batch
+    start = time.perf_counter()
+    results = [batch.search(query, k) for query in queries]
+    batch_time = (time.perf_counter() - start) / len(queries)
+    print(f"{f'Batch search (max_dist={k})':<34} | {batch_time * 1e3:>9.1f} ms  -> {loop_time / batch_time:.0f}x")
+
+    start = time.perf_counter()
+    full = batch.distances(queries[0])
+    print(f"{'Batch, all distances (no cut-off)':<34} | {(time.perf_counter() - start) * 1e3:>9.1f} ms")
+
+    # Validation against the original DP (pairs more than k apart in length are > k anyway)
+    query = queries[-1]
+    exact = [(word, levenshtein_distance(query, word)) for word in dictionary if abs(len(word) - len(query)) <= k]
+    assert results[-1] == sorted(((word, d) for word, d in exact if d <= k), key=lambda x: x[1])
+    assert [word for word, d in zip(sample, full) if d <= k] == slow
+    assert full[:2000].tolist() == [levenshtein_distance(queries[0], word) for word in dictionary[:2000]]
+    print(f"\n'{queries[-1]}' -> {results[-1][:5]}")
+    print("Success: Batch distances match levenshtein_distance().")
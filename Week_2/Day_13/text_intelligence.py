@@ -1,10 +1,13 @@
 import collections
+import itertools
+
+from edit_distance import MyersPattern
 
 # ==========================================
 # PART 1: 2D Dynamic Programming (Edit Distance)
 # ==========================================
 # Time Complexity: O(M * N)
-# Space Complexity: O(M * N) (Can be optimized to O(min(M,N))
+# Space Complexity: O(M * N) (Can be optimized to O(min(M,N)), see edit_distance.py)
 def levenshtein_distance(s1, s2):
     m, n = len(s1), len(s2)
     
@@ -68,26 +71,38 @@ class Trie:
 
     # O(L + V) - Find all words starting with prefix
     # L = length of prefix, V = number of nodes in subtree
-    def autocomplete(self, prefix):
-        results = []
+    def autocomplete(self, prefix, limit=None):
+        # itertools.islice stops the generator (and the DFS) after 'limit' words
+        return list(itertools.islice(self.iter_autocomplete(prefix), limit))
+
+    # Lazy version: yields words one at a time, in insertion order
+    def iter_autocomplete(self, prefix):
         node = self.root
         
         # Step 1: Navigate to the end of the prefix
         for char in prefix:
             if char not in node.children:
-                return [] # Prefix not found
+                return # Prefix not found
             node = node.children[char]
             
         # Step 2: DFS to find all complete words below this point
-        self._dfs(node, prefix, results)
-        return results
+        yield from self._iter_words(node, prefix)
     
-    def _dfs(self, node, path, results):
-        if node.is_end_of_word:
-            results.append(path)
-        
-        for char, child_node in node.children.items():
-            self._dfs(child_node, path + char, results)
+    def _iter_words(self, node, prefix):
+        # Iterative DFS (explicit stack): no recursion limit on very long words.
+        # The path is ONE shared list of chars; a string is only built when a word is found.
+        path = list(prefix)
+        stack = [(node, len(path), None)]
+        while stack:
+            node, depth, char = stack.pop()
+            del path[depth:] # Backtrack to this node's parent
+            if char is not None:
+                path.append(char)
+            if node.is_end_of_word:
+                yield "".join(path)
+            # Reversed, so the first child is popped (and yielded) first
+            for next_char, child_node in reversed(node.children.items()):
+                stack.append((child_node, len(path), next_char))
 
 # ==========================================
 # 3. EXECUTION & BENCHMARK
@@ -114,6 +129,8 @@ if __name__ == "__main__":
     typo = "nural"
     if not trie.search(typo):
         print(f"'{typo}' not found. Searching for suggestions...")
-        # In a real app, you wouldn't scan the whole list, but for this lab we will
-        candidates = [word for word in ml_terms if levenshtein_distance(typo, word) <= 2]
+        # In a real app, you wouldn't scan the whole list, but for this lab we will.
+        # The typo is compiled ONCE; each candidate stops as soon as it is > 2 edits away.
+        pattern = MyersPattern(typo)
+        candidates = [word for word in ml_terms if pattern.distance(word, max_dist=2) <= 2]
         print(f"Did you mean: {candidates}?")
\ No newline at end of file
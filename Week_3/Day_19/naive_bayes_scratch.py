@@ -1,9 +1,21 @@
 import math
+import os
+import sys
 from collections import defaultdict
 
+# The one-pass tokenizer (and the interned Vocabulary) live in the Day 20-21
+# autocomplete project; day folders are not packages, so its directory is put
+# on the import path (relative to this file, so the script runs from anywhere)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Day_20&21", "Project_A_Autocomplete"))
+from bigram_model import Vocabulary
+from tokenizer import Tokenizer
+
 class NaiveBayesClassifier:
-    def __init__(self):
-        self.vocab = set()
+    def __init__(self, tokenizer=None):
+        # Default: lowercase + whitespace split, punctuation kept (same as text.lower().split())
+        self.tokenizer = tokenizer or Tokenizer(delete="")
+        self.vocab = Vocabulary()  # word <-> id; the counts below are keyed by id
+        self._token_ids = self.tokenizer.id_map(self.vocab)
         self.class_counts = defaultdict(int)
         self.word_counts = defaultdict(lambda: defaultdict(int))
         self.total_words_per_class = defaultdict(int)
@@ -11,7 +23,7 @@ class NaiveBayesClassifier:
 
     def tokenize(self, text):
         """Converts text to lowercase and splits into words."""
-        return text.lower().split()
+        return self.tokenizer.tokens(text)
 
     def fit(self, X, y):
         """
@@ -23,16 +35,17 @@ class NaiveBayesClassifier:
         
         for text, label in zip(X, y):
             self.class_counts[label] += 1
-            words = self.tokenize(text)
+            # One pass: text -> interned word ids (new words join the vocabulary)
+            word_ids = self.tokenizer.ids(text, self._token_ids)
             
-            for word in words:
-                self.vocab.add(word)
-                self.word_counts[label][word] += 1
+            for word_id in word_ids:
+                self.word_counts[label][word_id] += 1
                 self.total_words_per_class[label] += 1
 
     def predict(self, text):
         """Predicts the class of a new text string."""
-        words = self.tokenize(text)
+        # Lookups only: unseen words get id -1 (count 0) and never grow the vocabulary
+        word_ids = [self.vocab.id(word) for word in self.tokenize(text)]
         best_class = None
         max_log_prob = float('-inf')
 
@@ -44,10 +57,10 @@ class NaiveBayesClassifier:
             log_prob = math.log(prior)
 
             # 2. Calculate the Log Likelihood: log(P(Word | Class))
-            for word in words:
+            for word_id in word_ids:
                 # LAPLACE SMOOTHING: Add 1 to numerator, add vocab size to denominator
                 # This prevents P(Word | Class) from ever being exactly 0
-                word_count = self.word_counts[label][word]
+                word_count = self.word_counts[label].get(word_id, 0)
                 total_words = self.total_words_per_class[label]
                 vocab_size = len(self.vocab)
                 
@@ -1,106 +1,677 @@
+import array
 import collections
+import concurrent.futures
+import itertools
+import mmap
+import os
+import threading
 
-class TrieNode:
-    """A single node in the Prefix Tree."""
-    def __init__(self):
-        self.children = {}
-        self.is_end_of_word = False
+from bigram_model import PAIR_MASK, PAIR_SHIFT, BigramMatrix, Vocabulary, merge_runs, sorted_run
+from compact_trie import CompactTrie
+from frozen_model import BACKOFF_WEIGHT, FrozenModel, TrieNode, insert_words
+from online_counts import OnlineCounts
+from pruning import BIGRAM_ENTRY_BYTES, PruneReport, prune_counts
+from prefix_cursor import PrefixCursor
+from snapshot import load_snapshot, save_snapshot
+from suggestion_cache import SuggestionCache
+from tokenizer import Tokenizer, iter_blocks
+
+# Characters of raw text held in memory at once by the streaming trainers
+DEFAULT_CHUNK_SIZE = 1 << 20
+# Distinct staged bigrams allowed in the dict before they are spilled as a sorted run
+STAGING_LIMIT = 1_000_000
+# Attempts at meeting a byte budget before settling for the closest model
+MAX_PRUNE_PASSES = 4
+
+def _iter_text_chunks(pieces, chunk_size, separator=""):
+    """
+    Regroups arbitrary text pieces (lines or raw file blocks) into blocks of
+    roughly 'chunk_size' characters that never cut a token in half:
+    a trailing partial token is held back and glued to the next piece.
+    'separator' goes after every piece: "\n" makes each piece end its last
+    token (items of train_stream), "" lets a token run on (raw file blocks).
+    """
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        if separator:
+            buffer.append(separator)
+        buffered += len(piece) + len(separator)
+        if buffered < chunk_size:
+            continue
+
+        text = "".join(buffer)
+        cut = len(text)
+        while cut > 0 and not text[cut - 1].isspace():
+            cut -= 1
+        if cut == 0:
+            # One giant token with no whitespace yet: keep buffering it
+            buffer = [text]
+            continue
+
+        yield text[:cut]
+        buffer = [text[cut:]]
+        buffered = len(buffer[0])
+
+    if buffer:
+        yield "".join(buffer)
+
+def _split_on_whitespace(text, n_shards):
+    """Cuts 'text' into ~equal shards, moving every cut forward to a whitespace char."""
+    bounds = [0]
+    for i in range(1, n_shards):
+        cut = max(bounds[-1], len(text) * i // n_shards)
+        while cut < len(text) and not text[cut].isspace():
+            cut += 1
+        bounds.append(cut)
+    bounds.append(len(text))
+    return [text[lo:hi] for lo, hi in zip(bounds, bounds[1:]) if lo < hi]
+
+def _in_node_trie(root, word):
+    node = root
+    for char in word:
+        if node is None:
+            return False
+        node = node.children.get(char)
+    return node is not None and node.is_end_of_word
+
+def _ascii_compatible(encoding):
+    """True if ASCII text (whitespace included) encodes to the same bytes (utf-8, latin-1...)."""
+    sample = "\t\n azAZ09."
+    return sample.encode(encoding) == sample.encode("ascii")
+
+def _check_k(k):
+    """k must be None (every suggestion) or an int >= 1."""
+    if k is not None and (isinstance(k, bool) or not isinstance(k, int) or k < 1):
+        raise ValueError(f"k must be None or an int >= 1, got {k!r}")
+
+def _count_shard(text, tokenizer):
+    """
+    MAP step (runs in a worker process): partial counts for one shard.
+    The first and last tokens are returned so the parent can stitch the
+    bigram that spans the boundary between two neighbouring shards.
+    """
+    # Intern locally: the parent only has to remap each LOCAL id once,
+    # and integer-keyed counts are much cheaper to send back than strings
+    local_vocab = Vocabulary()
+    ids = tokenizer.ids(text, tokenizer.id_map(local_vocab))
+    if not ids:
+        return None
+    unigrams = collections.Counter(ids[:-1])
+    pairs = collections.Counter((w1 << PAIR_SHIFT) | w2 for w1, w2 in zip(ids, ids[1:]))
+    return local_vocab.words, ids[0], ids[-1], unigrams, pairs
 
 class AutocompleteEngine:
-    def __init__(self):
-        # 1. The Data Structure (Phase 1)
-        self.root = TrieNode()
-        
-        # 2. The Math Engine (Phase 2)
-        # unigram_counts stores how many times a single word appears: {"machine": 3}
-        self.unigram_counts = collections.defaultdict(int)
-        # bigram_counts stores how many times word B follows word A: {"machine": {"learning": 2, "code": 1}}
-        self.bigram_counts = collections.defaultdict(lambda: collections.defaultdict(int))
-        # bigram_probs stores the final MLE probabilities: P(B|A)
-        self.bigram_probs = collections.defaultdict(lambda: collections.defaultdict(float))
+    TRIE_BACKENDS = ("node", "compact")
+    COMPLETION_ORDERS = ("lex", "freq")
+
+    def __init__(self, trie_backend="node", top_k=None, cache_size=None, cache_bytes=None, decay=None,
+                 pruning=None, tokenizer=None, backoff=BACKOFF_WEIGHT):
+        """
+        trie_backend: "node"    -> one TrieNode object per character (flexible, memory hungry)
+                      "compact" -> CompactTrie stored in flat typed arrays (see compact_trie.py)
+        top_k:        if set, every trie node stores its 'top_k' most frequent completions
+                      at training time, so suggest(..., k<=top_k) costs O(k), not O(subtree).
+        cache_size / cache_bytes: if set, suggest() results are kept in an LRU cache
+                      bounded by entry count and/or approximate bytes (cleared on retrain).
+        decay:        if set (0 < decay < 1), every observe() multiplies the weight of
+                      everything counted before it by 'decay' (new usage outweighs stale counts).
+        pruning:      a PruningPolicy (see pruning.py) applied after every training run, so
+                      rare words and weak bigrams can't grow the model without limit.
+        tokenizer:    a Tokenizer (see tokenizer.py) used by every training method and observe().
+                      Default: lowercase, periods removed.
+        backoff:      weight of the unigram score P(w) for a candidate never seen after the
+                      context (0 < backoff <= 1, see frozen_model.py).
+        """
+        if trie_backend not in self.TRIE_BACKENDS:
+            raise ValueError(f"trie_backend must be one of {self.TRIE_BACKENDS}, got {trie_backend!r}")
+        if decay is not None and not 0 < decay < 1:
+            raise ValueError(f"decay must be in (0, 1), got {decay!r}")
+        if not 0 < backoff <= 1:
+            raise ValueError(f"backoff must be in (0, 1], got {backoff!r}")
+        self.trie_backend = trie_backend
+        self.top_k = top_k
+        self.decay = decay
+        self.backoff = backoff
+        self.pruning = pruning
+        self.last_prune_report = None
+        self.tokenizer = tokenizer or Tokenizer()
+
+        # 1. The live model: Trie (Phase 1) + Math Engine (Phase 2), see frozen_model.py.
+        # vocab interns every word to an integer id: "machine" <-> 0
+        # bigrams stores Count(w) and Count(w1, w2) as a CSR sparse matrix over ids.
+        # Probabilities are derived on demand: P(w2 | w1) = Count(w1, w2) / Count(w1)
+        # Readers only ever see a complete version; training publishes a new one.
+        self.model = FrozenModel(
+            Vocabulary(), BigramMatrix(), trie_backend,
+            root=TrieNode() if trie_backend == "node" else None,
+            compact_trie=CompactTrie() if trie_backend == "compact" else None,
+            top_k=top_k, backoff=backoff,
+        )
+
+        # 2. Writer-side state of the training run in progress (None between runs)
+        self._vocab = None            # Copy of model.vocab that the new words are added to
+        self._bigrams = None          # model.bigrams + everything merged so far
+        self._pending_unigrams = {}   # {w_id: count}
+        self._pending_pairs = {}      # {(w1_id << 32) | w2_id: count}
+        self._runs = []               # Spilled pending_pairs: sorted (keys, counts) runs
+        self._scale = 1               # Factor applied to the existing counts by the first merge
+        self._token_ids = None        # Raw token -> id cache over _vocab (see tokenizer.py)
+        # Training runs are serialized among themselves (readers never wait on this)
+        self._train_lock = threading.Lock()
+        self._trainer = None          # Lazily created background training thread
+
+        # 3. The Result Cache (hot (context, prefix) pairs skip the trie entirely)
+        self.cache = None
+        if cache_size is not None or cache_bytes is not None:
+            self.cache = SuggestionCache(max_entries=cache_size, max_bytes=cache_bytes)
+
+    # Read-only views of the live model (one consistent version per attribute read;
+    # code that needs several of them together should grab self.model once)
+    @property
+    def vocab(self):
+        return self.model.vocab
+
+    @property
+    def bigrams(self):
+        return self.model.bigrams
+
+    @property
+    def root(self):
+        return self.model.root
+
+    @property
+    def compact_trie(self):
+        return self.model.compact_trie
+
+    @property
+    def model_version(self):
+        """Bumped on every model change, so long-lived readers (cursors) can resync."""
+        return self.model.version
 
     # ==========================================
     # PART 1: TRAINING THE MARKOV CHAIN
     # ==========================================
     def train(self, corpus):
         """Trains the engine by building the Trie and calculating Bigram probabilities."""
-        # Simple tokenization (convert to lowercase, split by space)
-        words = corpus.lower().replace('.', '').split()
-        
-        # 1. Build the Trie for fast prefix lookups
-        for word in set(words):
-            self._insert_into_trie(word)
-            
-        # 2. Count Frequencies (Maximum Likelihood Estimation)
-        for i in range(len(words) - 1):
-            w1, w2 = words[i], words[i+1]
-            self.unigram_counts[w1] += 1
-            self.bigram_counts[w1][w2] += 1
-            
-        # 3. Calculate Transition Probabilities: P(w2 | w1) = Count(w1, w2) / Count(w1)
-        for w1, following_words in self.bigram_counts.items():
-            for w2, count in following_words.items():
-                self.bigram_probs[w1][w2] = count / self.unigram_counts[w1]
+        with self._train_lock:
+            self._begin_training()
+
+            # 1. Tokenize straight to word ids (one pass, see tokenizer.py)
+            # and Count Frequencies (Maximum Likelihood Estimation)
+            self._count_ids(self.tokenizer.ids(corpus, self._token_ids), prev_id=-1)
+
+            # 2. Build the Trie + Transition Matrix
+            self._finalize_training()
+
+    def train_stream(self, lines, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Trains from ANY iterable of text (file lines, socket reads, generators...).
+        Text is processed in ~chunk_size character blocks, so memory stays flat
+        no matter how big the corpus is. The last token of each block is carried
+        into the next one, so no bigram is lost at a block boundary.
+        Every item ends a token (as if it were a line), even without a trailing
+        newline: ['machine learning', 'is fun'] trains like "machine learning is fun".
+        """
+        with self._train_lock:
+            self._begin_training()
+            self._count_blocks(_iter_text_chunks(lines, chunk_size, separator="\n"))
+            self._finalize_training()
+
+    def train_from_files(self, paths, encoding="utf-8", chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Streams one or more corpus files (treated as ONE continuous text, as if
+        they were concatenated with a newline in between).
+        Files are memory-mapped and tokenized as raw bytes (no decoding of ASCII
+        text) when the encoding is ASCII-compatible, e.g. utf-8 or latin-1.
+        """
+        if _ascii_compatible(encoding):
+            def mapped_blocks():
+                for path in paths:
+                    with open(path, "rb") as f:
+                        if os.fstat(f.fileno()).st_size == 0:
+                            continue  # mmap can't map an empty file
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                            # A block never ends mid-token, and neither does a file
+                            yield from iter_blocks(mapped, chunk_size)
+
+            with self._train_lock:
+                self._begin_training()
+                self._count_blocks(mapped_blocks(), encoding)
+                self._finalize_training()
+            return
+
+        def read_blocks():
+            for path in paths:
+                with open(path, encoding=encoding) as f:
+                    while True:
+                        block = f.read(chunk_size)
+                        if not block:
+                            break
+                        yield block
+                yield "\n"  # A file boundary always ends the current token
+
+        with self._train_lock:
+            self._begin_training()
+            # Raw blocks may cut a token: no separator, the chunker re-joins it
+            self._count_blocks(_iter_text_chunks(read_blocks(), chunk_size))
+            self._finalize_training()
+
+    def train_parallel(self, corpus, processes=None, shards_per_process=1):
+        """
+        Map-Reduce training: the corpus is split on whitespace into shards,
+        a process pool counts every shard (MAP), and the partial counts are
+        merged IN SHARD ORDER (REDUCE), so the result is deterministic and
+        identical to train(corpus).
+        """
+        processes = processes or os.cpu_count() or 1
+        shards = _split_on_whitespace(corpus, processes * shards_per_process)
+
+        with self._train_lock:
+            self._begin_training()
+            prev_id = -1
+            pending_unigrams, pending_pairs = self._pending_unigrams, self._pending_pairs
+            with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+                # map() yields results in submission order -> deterministic merge
+                # (and words get the same ids as with train(), in first-seen order)
+                for partial in pool.map(_count_shard, shards, itertools.repeat(self.tokenizer)):
+                    if partial is None:
+                        continue
+                    local_words, first, last, unigrams, pairs = partial
+                    remap = [self._vocab.add(word) for word in local_words]
+
+                    # The bigram crossing the shard boundary: (last of previous shard, first of this one)
+                    if prev_id >= 0:
+                        key = (prev_id << PAIR_SHIFT) | remap[first]
+                        pending_unigrams[prev_id] = pending_unigrams.get(prev_id, 0) + 1
+                        pending_pairs[key] = pending_pairs.get(key, 0) + 1
+
+                    for local_id, count in unigrams.items():
+                        word_id = remap[local_id]
+                        pending_unigrams[word_id] = pending_unigrams.get(word_id, 0) + count
+                    for local_key, count in pairs.items():
+                        key = (remap[local_key >> PAIR_SHIFT] << PAIR_SHIFT) | remap[local_key & PAIR_MASK]
+                        pending_pairs[key] = pending_pairs.get(key, 0) + count
+                    prev_id = remap[last]
+
+            self._finalize_training()
+
+    def train_in_background(self, train_method, *args, **kwargs):
+        """
+        Runs a training method (e.g. engine.train_from_files) on a background
+        thread and returns its Future. suggest() keeps answering from the current
+        model the whole time; the new model replaces it atomically when done.
+        (Counting is pure Python and shares the GIL with the readers; train_parallel
+        moves most of that work into other processes.)
+        """
+        if self._trainer is None:
+            self._trainer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrain")
+        return self._trainer.submit(train_method, *args, **kwargs)
+
+    def observe(self, context_word, word):
+        """
+        Online learning: counts ONE accepted (context_word -> word) transition,
+        e.g. a suggestion the user picked, without retraining. Costs O(len(word)):
+        two count increments plus (for a word not yet in the overlay) one
+        path-copying trie insertion. The counts are folded into the CSR matrix
+        by the next training run (or compact_observations()).
+        """
+        context_word = self.tokenizer.normalize(context_word).strip()
+        word = self.tokenizer.normalize(word).strip()
+        if not word:
+            return
+        with self._train_lock:
+            model = self.model
+            online = model.online
+            if online is None:
+                online = OnlineCounts(len(model.vocab), self.decay)
+
+            # Every word whose count changes goes into the overlay trie: new words
+            # become completable, and Top-K lists can re-rank the changed ones
+            touched = [word]
+            w2_id = online.intern(word, model.vocab)
+            if context_word:
+                online.add(online.intern(context_word, model.vocab), w2_id)
+                touched.append(context_word)
+            online_root = model.online_root
+            missing = [w for w in touched if not _in_node_trie(online_root, w)]
+            if missing:
+                online_root = insert_words(online_root, missing)
+
+            if online.needs_rescale():
+                online = online.rescaled()
+            self.model = model.with_online(online, online_root)
+            # Entries keyed on the old version can never hit again: free their budget now
+            if self.cache is not None:
+                self.cache.clear()
+
+    def compact_observations(self):
+        """Folds the observe() overlay into a freshly built model (a retrain with no new text)."""
+        with self._train_lock:
+            self._begin_training()
+            self._finalize_training()
+
+    def _folded_model(self):
+        """
+        The live model with the observe() overlay folded into its CSR matrix,
+        built but NOT published (caller holds _train_lock).
+        """
+        self._begin_training()
+        self._merge_pending()
+        model = self._build_model(self._vocab, self._bigrams, self.model)
+        self._vocab = self._bigrams = self._token_ids = None
+        return model
+
+    def _begin_training(self):
+        """Starts a copy-on-write build on top of the live model (caller holds _train_lock)."""
+        vocab = self.model.vocab
+        # A snapshot's mapped vocabulary keeps its ids, so the CSR arrays stay valid as-is
+        self._vocab = vocab.copy() if isinstance(vocab, Vocabulary) else Vocabulary(vocab[:])
+        self._bigrams = self.model.bigrams
+        self._token_ids = self.tokenizer.id_map(self._vocab)
+        self._pending_unigrams = {}
+        self._pending_pairs = {}
+        self._runs = []
+        self._scale = 1
+
+        # Fold in the online observations (their new words were numbered right
+        # after the base vocabulary, so interning them in order keeps their ids)
+        online = self.model.online
+        if online is not None:
+            for word in online.words:
+                self._vocab.add(word)
+            self._pending_unigrams, self._pending_pairs, self._scale = online.folded()
+
+    def _count_blocks(self, blocks, encoding="utf-8"):
+        """Tokenizes + counts a stream of blocks (str or bytes) that never cut a token in half."""
+        prev_id = -1
+        for block in blocks:
+            prev_id = self._count_ids(self.tokenizer.ids(block, self._token_ids, encoding), prev_id)
+            if len(self._pending_pairs) > STAGING_LIMIT:
+                self._spill_pending()
+
+    def _count_ids(self, ids, prev_id):
+        """
+        Stages the unigram/bigram counts of one block of word ids.
+        prev_id is the id of the last token of the PREVIOUS block (-1 at the start),
+        and the id of the last token of this block is returned for the next call.
+        """
+        pending_unigrams, pending_pairs = self._pending_unigrams, self._pending_pairs
+        for w2_id in ids:
+            if prev_id >= 0:
+                key = (prev_id << PAIR_SHIFT) | w2_id
+                pending_unigrams[prev_id] = pending_unigrams.get(prev_id, 0) + 1
+                pending_pairs[key] = pending_pairs.get(key, 0) + 1
+            prev_id = w2_id
+        return prev_id
+
+    def _spill_pending(self):
+        """
+        Moves the staged pairs into a sorted run (16 bytes per pair instead of a
+        dict entry). Like an LSM tree, a new run is merged into the previous one
+        while that one is less than twice its size, so there are O(log n) runs
+        and each pair is re-merged O(log n) times, never once per spill.
+        """
+        runs = self._runs
+        runs.append(sorted_run(self._pending_pairs))
+        self._pending_pairs = {}
+        while len(runs) > 1 and len(runs[-2][0]) <= 2 * len(runs[-1][0]):
+            keys = array.array('Q')
+            counts = array.array('d')
+            for key, count in merge_runs(runs[-2:]):
+                keys.append(key)
+                counts.append(count)
+            runs[-2:] = [(keys, counts)]
+
+    def _merge_pending(self):
+        """Folds the staged counts into a freshly built CSR matrix (once per training run)."""
+        if (self._pending_unigrams or self._pending_pairs or self._runs or self._scale != 1
+                or len(self._bigrams.unigram_counts) < len(self._vocab)):
+            runs = self._runs + [sorted_run(self._pending_pairs)]
+            self._bigrams = self._bigrams.merged(self._pending_unigrams, merge_runs(runs),
+                                                 len(self._vocab), tie_key=self._vocab.word, scale=self._scale)
+        self._pending_unigrams = {}
+        self._pending_pairs = {}
+        self._runs = []
+        self._scale = 1
+
+    def _finalize_training(self):
+        """Builds the new model next to the live one, then swaps it in."""
+        # 1. Merge the new counts. P(w2 | w1) = Count(w1, w2) / Count(w1) is derived on demand
+        self._merge_pending()
+
+        # 2. Build the Trie (and Top-K lists) without touching the live model
+        model = self._build_model(self._vocab, self._bigrams, self.model)
+        self._vocab = self._bigrams = self._token_ids = None
+
+        # 3. (Optional) Keep memory bounded: evict rare words / weak bigrams
+        if self.pruning is not None:
+            model, self.last_prune_report = self._pruned(model, self.pruning)
+
+        # 4. Publish: ONE reference swap. Every cached suggestion (and open cursor) is now stale
+        self.model = model
+        if self.cache is not None:
+            self.cache.clear()
                 
-        print(f"Engine Trained! Vocabulary size: {len(self.unigram_counts)} words.")
+        contexts = sum(1 for count in model.bigrams.unigram_counts if count)
+        print(f"Engine Trained! Vocabulary size: {contexts} words.")
+        if self.pruning is not None:
+            print(self.last_prune_report)
+
+    def _build_model(self, vocab, bigrams, old, rebuild=False):
+        """
+        A new (unpublished) model version over 'vocab' + 'bigrams'.
+        rebuild=False: vocab extends old.vocab, so the old trie is reused/extended.
+        rebuild=True:  ids changed (pruning), so the trie is built from scratch.
+        """
+        # Sorted insertion keeps children in lexicographic order for both backends
+        new_words = vocab.words if rebuild else vocab.words[len(old.vocab):]
+        root = compact_trie = None
+        if self.trie_backend == "compact":
+            # The array layout is static, so we rebuild it with the merged vocabulary
+            if rebuild or new_words:
+                compact_trie = CompactTrie(vocab.words)
+            elif self.top_k is not None:
+                # Same structure, new Top-K lists: share the arrays, own the lists
+                trie = old.compact_trie
+                compact_trie = CompactTrie.from_arrays(trie.alphabet, trie.first_child, trie.labels, trie.is_end)
+            else:
+                compact_trie = old.compact_trie
+        elif rebuild:
+            root = insert_words(None, sorted(new_words))
+        elif new_words or self.top_k is not None:
+            # Every Top-K list may change, so in top_k mode every node is copied anyway
+            root = insert_words(old.root, sorted(new_words), copy_all=self.top_k is not None)
+        else:
+            root = old.root
+
+        model = FrozenModel(vocab, bigrams, self.trie_backend, root=root, compact_trie=compact_trie,
+                            top_k=self.top_k, version=old.version + 1, backoff=self.backoff)
+
+        # (Optional) Precompute the ranked lists used by the O(k) suggest path
+        if self.top_k is not None:
+            model.build_top_completions()
+        return model
+
+    def prune(self, policy=None):
+        """
+        Prunes the live model now (copy-on-write, like a retrain) and returns a
+        PruneReport. policy: a PruningPolicy (defaults to the engine's own).
+        """
+        policy = policy or self.pruning
+        if policy is None:
+            raise ValueError("prune() needs a PruningPolicy (none was given to the engine)")
+        with self._train_lock:
+            if self.model.online is not None:
+                self.model = self._folded_model()
+            model, report = self._pruned(self.model, policy)
+            self.model = model
+            self.last_prune_report = report
+            if self.cache is not None:
+                self.cache.clear()
+        return report
+
+    def _pruned(self, model, policy):
+        """(pruned model, PruneReport). Re-prunes until the MEASURED size fits max_bytes."""
+        num_entries = model.bigrams.num_bigrams()
+        bytes_before = model.nbytes()
+        # Cost of one word outside its bigram entries, measured on the model itself
+        bytes_per_word = (bytes_before - BIGRAM_ENTRY_BYTES * num_entries) / max(1, len(model.vocab))
+
+        for _ in range(MAX_PRUNE_PASSES):
+            vocab, bigrams, quality = prune_counts(model.vocab, model.bigrams, policy, bytes_per_word)
+            pruned = self._build_model(vocab, bigrams, model, rebuild=True)
+            bytes_after = pruned.nbytes()
+            if policy.max_bytes is None or bytes_after <= policy.max_bytes or not len(vocab):
+                break
+            # The estimate was too optimistic: retry with this model's real cost per word
+            bytes_per_word *= max(1.05, (bytes_after - BIGRAM_ENTRY_BYTES * bigrams.num_bigrams())
+                                  / max(1, len(vocab)) / bytes_per_word)
+
+        report = PruneReport(len(model.vocab), len(vocab), num_entries, bigrams.num_bigrams(),
+                             bytes_before, bytes_after, *quality)
+        return pruned, report
+
+    # ==========================================
+    # PART 1.5: PERSISTENCE (COLD START)
+    # ==========================================
+    def save(self, path):
+        """
+        Writes a versioned binary snapshot (see snapshot.py for the layout).
+        The format only stores whole counts, so observe() updates are folded
+        into a COPY of the model first: decayed (fractional) weights are rounded
+        and bigrams that round to 0 are dropped. The live model, its overlay
+        and the suggestion cache are left untouched.
+        """
+        with self._train_lock:
+            model = self.model
+            if model.online is not None:
+                model = self._folded_model()
+        save_snapshot(model, path)
+
+    @classmethod
+    def load(cls, path, **options):
+        """
+        Memory-maps a snapshot written by save(). Start-up cost is O(1): the OS
+        pages the arrays in on demand, and processes loading the same file share them.
+        options: extra constructor arguments (e.g. cache_size).
+        """
+        mapped = load_snapshot(path)
+        engine = cls(trie_backend="compact", top_k=mapped.top_k, **options)
+        engine.model = FrozenModel(mapped.vocab, mapped.bigrams, "compact", compact_trie=mapped.compact_trie,
+                                   top_k=mapped.top_k, mapped=mapped, backoff=engine.backoff)
+        return engine
 
     # ==========================================
     # PART 2: TRIE OPERATIONS (SPEED)
     # ==========================================
-    def _insert_into_trie(self, word):
-        node = self.root
-        for char in word:
-            if char not in node.children:
-                node.children[char] = TrieNode()
-            node = node.children[char]
-        node.is_end_of_word = True
-
-    def _find_words_with_prefix(self, prefix):
-        """Returns all words in the Trie that start with 'prefix'."""
-        node = self.root
-        for char in prefix:
-            if char not in node.children:
-                return [] # Prefix not found
-            node = node.children[char]
-            
-        # Do a Depth First Search (DFS) from this node to find all valid endings
-        results = []
-        self._dfs(node, prefix, results)
-        return results
+    def iter_completions(self, prefix, order="lex"):
+        """
+        Lazily yields every word starting with 'prefix', so a caller that only
+        needs a few (islice, break) never enumerates the whole subtree.
+        order="lex":  alphabetical.
+        order="freq": most frequent first (ties alphabetical).
+        """
+        if order not in self.COMPLETION_ORDERS:
+            raise ValueError(f"order must be one of {self.COMPLETION_ORDERS}, got {order!r}")
+        return self.model.iter_completions(prefix, order)
+
+    # ==========================================
+    # PART 2.75: MODEL LOOKUPS (never grow the model)
+    # ==========================================
+    def unigram_count(self, word):
+        return self.model.unigram_count(word)
+
+    def bigram_count(self, w1, w2):
+        return self.model.bigram_count(w1, w2)
+
+    def bigram_prob(self, w1, w2):
+        """P(w2 | w1), computed from the counts on demand."""
+        return self.model.bigram_prob(w1, w2)
 
-    def _dfs(self, node, path, results):
-        if node.is_end_of_word:
-            results.append(path)
-        for char, next_node in node.children.items():
-            self._dfs(next_node, path + char, results)
+    def successors(self, word):
+        """Yields (next_word, P(next_word | word)), most probable first."""
+        return self.model.successors(word)
 
     # ==========================================
     # PART 3: THE AUTOCOMPLETE LOGIC (INTELLIGENCE)
     # ==========================================
-    def suggest(self, context_word, partial_word):
+    def cursor(self, context_word=""):
+        """A keystroke-incremental session over this engine (see prefix_cursor.py)."""
+        return PrefixCursor(self, context_word)
+
+    def suggest(self, context_word, partial_word, k=None):
         """
         Suggests completions for 'partial_word' based on the preceding 'context_word'.
+        k: return only the best 'k' suggestions (uses the O(k) path in top_k mode).
         """
-        # Step 1: Get all mathematically possible words from the Trie
-        candidates = self._find_words_with_prefix(partial_word)
-        
-        # Step 2: Rank them using our Markov Chain probabilities
-        ranked_suggestions = []
-        for cand in candidates:
-            # Look up P(candidate | context_word). Defaults to 0.0 if never seen together.
-            prob = self.bigram_probs[context_word].get(cand, 0.0)
-            
-            # (In a real system, if prob is 0, we'd fallback to the unigram probability of the candidate)
-            ranked_suggestions.append((cand, prob))
-            
-        # Step 3: Sort by highest probability first
-        ranked_suggestions.sort(key=lambda x: x[1], reverse=True)
-        return ranked_suggestions
-
-
-# ==========================================
-# EXECUTION
-# ==========================================
+        _check_k(k)
+        model = self.model  # One consistent version for this whole request
+        if self.cache is None:
+            return model.rank_suggestions(context_word, partial_word, k)
+
+        # The version is part of the key: a result computed on an old model can
+        # never be served after the swap, even if it is stored after the clear()
+        key = (model.version, context_word, partial_word, k)
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = tuple(model.rank_suggestions(context_word, partial_word, k))
+            self.cache.put(key, cached)
+        return list(cached)  # A fresh list, so callers can't corrupt the cache
+
+    def complete_phrase(self, context_word, partial_word, max_words=3, beam_width=3):
+        """
+        Completes the word being typed AND the most probable words after it
+        (beam search, see FrozenModel.complete_phrase), e.g.
+        ("machine", "l") -> [("learning is a", 0.12), ...].
+        Returns up to beam_width (phrase, probability) pairs.
+        """
+        if max_words < 1 or beam_width < 1:
+            raise ValueError(f"max_words and beam_width must be >= 1, got {max_words!r}, {beam_width!r}")
+        return self.model.complete_phrase(context_word, partial_word, max_words, beam_width)
+
+    def suggest_batch(self, queries):
+        """
+        Answers many (context_word, partial_word, k) queries at once.
+        Queries that share a prefix share ONE trie walk; only the (cheap)
+        ranking step is repeated per context.
+        """
+        for _, _, k in queries:
+            _check_k(k)  # The whole batch is rejected before anything is computed or cached
+        model = self.model
+        results = [None] * len(queries)
+        by_prefix = collections.defaultdict(list)
+        for i, (_, partial_word, _) in enumerate(queries):
+            by_prefix[partial_word].append(i)
+
+        for partial_word, indices in by_prefix.items():
+            candidates = None
+            for i in indices:
+                context_word, _, k = queries[i]
+                key = (model.version, context_word, partial_word, k)
+                cached = self.cache.get(key) if self.cache is not None else None
+                if cached is not None:
+                    results[i] = list(cached)
+                    continue
+
+                if candidates is None and not model.uses_top_k_path(k):
+                    candidates = model.words_with_prefix(partial_word)
+                results[i] = model.rank_suggestions(context_word, partial_word, k, candidates)
+                if self.cache is not None:
+                    self.cache.put(key, tuple(results[i]))
+        return results
+
+    def suggest_fuzzy(self, context_word, partial_word, max_dist=1, k=None):
+        """
+        Typo-tolerant suggest(): completions of any prefix within 'max_dist'
+        edits of 'partial_word' (see fuzzy_search.py), ranked by P(cand | context),
+        then by edit distance (exact prefix matches first).
+        """
+        _check_k(k)
+        return self.model.suggest_fuzzy(context_word, partial_word, max_dist, k)
+
+
 if __name__ == "__main__":
     # A small corpus mimicking technical writing
     corpus = """
@@ -131,4 +702,24 @@ if __name__ == "__main__":
     suggestions = engine.suggest(context, prefix)
     
     for word, prob in suggestions:
-        print(f" -> Suggestion: {word:<15} | Probability: {prob:.2%}")
\ No newline at end of file
+        print(f" -> Suggestion: {word:<15} | Probability: {prob:.2%}")
+
+    print("\n--- Phrase Completion (Beam Search) ---")
+    context, prefix = "machine", "l"
+    print(f"\nUser typed: '{context} {prefix}...'")
+    for phrase, prob in engine.complete_phrase(context, prefix, max_words=4, beam_width=3):
+        print(f" -> Phrase: {phrase:<35} | Probability: {prob:.2%}")
+
+    # Every beam entry dead-ends ("data" ends the corpus): each phrase is listed once
+    context, prefix = "require", "d"
+    phrases = engine.complete_phrase(context, prefix, max_words=3, beam_width=3)
+    print(f"\nUser typed: '{context} {prefix}...' -> {phrases}")
+    assert phrases == [("data", 1.0)], phrases
+
+    print("\n--- Streaming Training ---")
+    # Each item ends a token, even without a trailing newline (no "learningis")
+    streamed = AutocompleteEngine()
+    streamed.train_stream(["machine learning", "is fun"])
+    print(f"Streamed vocabulary: {streamed.vocab.words}")
+    assert streamed.vocab.words == ["machine", "learning", "is", "fun"], streamed.vocab.words
+    assert streamed.bigram_count("learning", "is") == 1
@@ -0,0 +1,250 @@
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import string
+import sys
+import time
+
+from autocomplete_engine import AutocompleteEngine
+
+# ==========================================
+# BENCHMARK SUITE: AutocompleteEngine at scale
+# ==========================================
+# For every corpus size (or local text file) a FRESH process:
+#   1. streams the corpus into train_stream()      -> training throughput
+#   2. reads the process RSS                       -> peak RSS, bytes / vocab word
+#   3. times suggest() for prefix lengths 1..5     -> latency percentiles
+# Each run lives in its own process so peak RSS is not polluted by earlier runs.
+#
+# Usage:
+#   python benchmark.py --sizes 10000 100000 1000000 --output bench.json
+#   python benchmark.py --files corpus.txt --baseline bench.json   (flags regressions)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+PREFIX_LENGTHS = range(1, 6)
+
+# Metric -> +1 if bigger is better, -1 if smaller is better
+METRIC_DIRECTIONS = {
+    "train_tokens_per_sec": +1,
+    "peak_rss_bytes": -1,
+    "bytes_per_vocab_word": -1,
+}
+for _length in PREFIX_LENGTHS:
+    METRIC_DIRECTIONS[f"suggest_p50_us_len{_length}"] = -1
+    METRIC_DIRECTIONS[f"suggest_p99_us_len{_length}"] = -1
+
+# ==========================================
+# PART 1: SYNTHETIC ZIPF CORPORA
+# ==========================================
+def vocabulary_size_for(n_tokens):
+    """Heaps' law: vocabulary grows roughly like n^0.6 for natural text."""
+    return max(1_000, int(20 * n_tokens ** 0.6))
+
+def synthetic_vocabulary(size, seed):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 12))))
+    words = sorted(words)
+    rng.shuffle(words)  # Rank (frequency) must not correlate with spelling
+    return words
+
+def zipf_lines(n_tokens, seed=42, exponent=1.1, words_per_line=20):
+    """
+    Lazily yields lines of a corpus whose word frequencies follow Zipf's law
+    (frequency of rank r ~ 1 / r^exponent). Nothing but the vocabulary is held in memory.
+    """
+    rng = random.Random(seed)
+    vocab = synthetic_vocabulary(vocabulary_size_for(n_tokens), seed)
+    cum_weights = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, len(vocab) + 1)))
+    produced = 0
+    while produced < n_tokens:
+        count = min(words_per_line, n_tokens - produced)
+        yield " ".join(rng.choices(vocab, cum_weights=cum_weights, k=count)) + "\n"
+        produced += count
+
+# ==========================================
+# PART 2: MEASUREMENTS
+# ==========================================
+def current_rss_bytes():
+    """Resident memory right now (Linux /proc), falling back to the peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return peak_rss_bytes()
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def sample_queries(engine, n_queries, seed):
+    """(context, prefix) pairs drawn like real traffic: frequent words more often."""
+    rng = random.Random(seed)
+    words = [word for word in engine.vocab.words if engine.unigram_count(word)]
+    cum_weights = list(itertools.accumulate(engine.unigram_count(word) for word in words))
+    queries = {}
+    for length in PREFIX_LENGTHS:
+        eligible = []
+        while len(eligible) < n_queries:
+            context, target = rng.choices(words, cum_weights=cum_weights, k=2)
+            if len(target) >= length:
+                eligible.append((context, target[:length]))
+        queries[length] = eligible
+    return queries
+
+def run_single(label, source, engine_options, n_queries, k):
+    """Runs in a fresh worker process. Returns one result row."""
+    baseline_rss = current_rss_bytes()
+    engine = AutocompleteEngine(**engine_options)
+
+    if source["kind"] == "synthetic":
+        lines = zipf_lines(source["tokens"], seed=source["seed"])
+        train = lambda: engine.train_stream(lines)
+    else:
+        train = lambda: engine.train_from_files(source["paths"])
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        train()
+    train_seconds = time.perf_counter() - start
+
+    tokens = sum(engine.bigrams.unigram_counts) + 1  # Every token but the last starts a bigram
+    model_bytes = max(0, current_rss_bytes() - baseline_rss)
+
+    row = {
+        "label": label,
+        "tokens": tokens,
+        "vocab_words": len(engine.vocab),
+        "bigrams": engine.bigrams.num_bigrams(),
+        "train_seconds": train_seconds,
+        "train_tokens_per_sec": tokens / train_seconds,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "bytes_per_vocab_word": model_bytes / max(1, len(engine.vocab)),
+    }
+
+    for length, queries in sample_queries(engine, n_queries, seed=7).items():
+        timings = []
+        for context, prefix in queries:
+            t0 = time.perf_counter()
+            engine.suggest(context, prefix, k=k)
+            timings.append(time.perf_counter() - t0)
+        timings.sort()
+        row[f"suggest_p50_us_len{length}"] = percentile(timings, 50) * 1e6
+        row[f"suggest_p99_us_len{length}"] = percentile(timings, 99) * 1e6
+    return row
+
+def run_isolated(*args):
+    """Executes run_single() in a brand-new process (clean RSS accounting)."""
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_single, *args).result()
+
+# ==========================================
+# PART 3: BASELINE COMPARISON
+# ==========================================
+def settings_mismatches(baseline, settings):
+    """Settings (engine options, k, queries) that differ from the baseline's: its numbers are not comparable."""
+    recorded = dict(baseline.get("engine_options", {}), k=baseline.get("k"), queries=baseline.get("queries"))
+    return [f"{name}: {recorded.get(name, 'not recorded')!r} in the baseline, {value!r} now"
+            for name, value in settings.items() if recorded.get(name, "not recorded") != value]
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Returns a list of human-readable regressions (worse than 'tolerance' relative)."""
+    previous = {row["label"]: row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        old = previous.get(row["label"])
+        if old is None:
+            continue
+        for metric, direction in METRIC_DIRECTIONS.items():
+            if metric not in old or metric not in row or not old[metric]:
+                continue
+            change = (row[metric] - old[metric]) / old[metric]
+            if direction * change < -tolerance:
+                regressions.append(f"{row['label']}: {metric} {old[metric]:,.1f} -> {row[metric]:,.1f} "
+                                   f"({change:+.1%})")
+    return regressions
+
+def print_table(results):
+    print(f"\n{'Corpus':<22} | {'Vocab':>9} | {'Tokens/s':>10} | {'Peak RSS':>9} | {'B/word':>7} | "
+          + " | ".join(f"p99 len{length}" for length in PREFIX_LENGTHS))
+    print("-" * 130)
+    for row in results:
+        latencies = " | ".join(f"{row[f'suggest_p99_us_len{length}']:>6.0f}us" for length in PREFIX_LENGTHS)
+        print(f"{row['label']:<22} | {row['vocab_words']:>9,} | {row['train_tokens_per_sec']:>10,.0f} | "
+              f"{row['peak_rss_bytes'] / 2**20:>6.0f} MB | {row['bytes_per_vocab_word']:>7.0f} | {latencies}")
+
+# ==========================================
+# EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark AutocompleteEngine across corpus sizes.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES,
+                        help="synthetic Zipf corpus sizes in tokens")
+    parser.add_argument("--files", nargs="*", default=[], help="local text files (one run per file)")
+    parser.add_argument("--trie-backend", choices=AutocompleteEngine.TRIE_BACKENDS, default="node")
+    parser.add_argument("--top-k", type=int, default=None)
+    parser.add_argument("--k", type=int, default=3, help="suggestions requested per query")
+    parser.add_argument("--queries", type=int, default=500, help="queries per prefix length")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against a previous JSON result file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="relative change flagged as regression")
+    args = parser.parse_args()
+
+    engine_options = {"trie_backend": args.trie_backend, "top_k": args.top_k}
+    baseline = None
+    if args.baseline:
+        # Checked BEFORE running: latencies from other settings would flag (or hide) bogus regressions
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatches = settings_mismatches(baseline, dict(engine_options, k=args.k, queries=args.queries))
+        if mismatches:
+            print(f"Refusing to compare with {args.baseline}: it was recorded with different settings:")
+            for line in mismatches:
+                print(f"  - {line}")
+            sys.exit(2)
+    runs = [(f"zipf-{tokens:,}", {"kind": "synthetic", "tokens": tokens, "seed": 42}) for tokens in args.sizes]
+    runs += [(os.path.basename(path), {"kind": "files", "paths": [path]}) for path in args.files]
+
+    results = []
+    for label, source in runs:
+        print(f"Running {label}...", flush=True)
+        results.append(run_isolated(label, source, engine_options, args.queries, args.k))
+    print_table(results)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine_options": engine_options,
+        "k": args.k,
+        "queries": args.queries,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.baseline} (tolerance {args.tolerance:.0%}).")
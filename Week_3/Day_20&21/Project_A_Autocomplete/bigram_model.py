@@ -0,0 +1,252 @@
+import array
+import bisect
+import heapq
+import itertools
+import sys
+
+# ==========================================
+# THEORY: Interned Vocabulary + CSR Bigram Matrix
+# ==========================================
+# Nested dicts of strings ({"machine": {"learning": 2}}) cost ~100+ bytes per
+# entry. Instead:
+#   1. Every word is INTERNED once: word <-> small integer id.
+#   2. The bigram counts form a sparse V x V matrix stored in CSR format:
+#        successors[row_offsets[w1] : row_offsets[w1 + 1]]  -> ids that followed w1
+#        counts[...]                                        -> how often (aligned)
+#      That is 4 + 8 bytes per observed bigram, plus 8 bytes per word.
+#   3. Probabilities are never stored: P(w2 | w1) = count / unigram_counts[w1].
+# Every row is sorted by count (highest first, ties alphabetical), so the best
+# successors of a word are simply the first entries of its row.
+#   4. word_order (aligned with successors) lists each row's entries again,
+#      sorted by WORD (as offsets into the row). It is computed once per
+#      build, so "the successors of w1 starting with 'le'" are one slice found
+#      by 2 binary searches, with no per-query sort. Cost: 4 bytes per bigram.
+#   5. Counts staged during training are spilled as SORTED RUNS of pair keys
+#      ((w1 << 32) | w2), so the final merge reads them row by row and only
+#      rebuilds the rows that actually changed.
+
+PAIR_SHIFT = 32
+PAIR_MASK = (1 << PAIR_SHIFT) - 1
+
+
+def sorted_run(pairs):
+    """{pair_key: count} -> (keys, counts) arrays in key order (16 bytes per pair)."""
+    keys = array.array('Q', sorted(pairs))
+    return keys, array.array('d', [pairs[key] for key in keys])
+
+
+def merge_runs(runs):
+    """Yields (pair_key, count) in key order across sorted runs, summing equal keys."""
+    pairs = [zip(keys, counts) for keys, counts in runs if keys]
+    if len(pairs) == 1:
+        yield from pairs[0]  # A single run has no duplicate keys
+        return
+    last_key, total = -1, 0
+    for key, count in heapq.merge(*pairs):
+        if key == last_key:
+            total += count
+            continue
+        if last_key >= 0:
+            yield last_key, total
+        last_key, total = key, count
+    if last_key >= 0:
+        yield last_key, total
+
+
+class Vocabulary:
+    """Growable word <-> id mapping (ids are assigned in insertion order)."""
+    def __init__(self, words=()):
+        self.words = []
+        self._ids = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        """Returns the id of 'word', interning it if it is new."""
+        word_id = self._ids.get(word)
+        if word_id is None:
+            word_id = len(self.words)
+            self._ids[word] = word_id
+            self.words.append(word)
+        return word_id
+
+    def id(self, word):
+        """Returns -1 for unknown words (lookups never grow the vocabulary)."""
+        return self._ids.get(word, -1)
+
+    def word(self, word_id):
+        return self.words[word_id]
+
+    def copy(self):
+        """An independent copy (same ids) that can grow without affecting this one."""
+        vocab = Vocabulary()
+        vocab.words = list(self.words)
+        vocab._ids = dict(self._ids)
+        return vocab
+
+    def __len__(self):
+        return len(self.words)
+
+    def nbytes(self):
+        """Approximate bytes held: the word list, the id dict and the strings themselves."""
+        return (sys.getsizeof(self.words) + sys.getsizeof(self._ids)
+                + sum(sys.getsizeof(word) for word in self.words))
+
+    def __contains__(self, word):
+        return word in self._ids
+
+
+class BigramMatrix:
+    """Unigram counts + CSR bigram counts over word ids (read-only once built)."""
+    def __init__(self, unigram_counts=None, row_offsets=None, successors=None, counts=None, word_order=None):
+        # Any sequence works here: array.array when trained, memoryview when mmapped
+        self.unigram_counts = unigram_counts if unigram_counts is not None else array.array('Q')
+        self.row_offsets = row_offsets if row_offsets is not None else array.array('Q', [0])
+        self.successors = successors if successors is not None else array.array('I')
+        self.counts = counts if counts is not None else array.array('Q')
+        # None until sort_rows_by_word() (an empty matrix has nothing to sort)
+        if word_order is None and not self.successors:
+            word_order = array.array('I')
+        self.word_order = word_order
+
+    def unigram(self, word_id):
+        if 0 <= word_id < len(self.unigram_counts):
+            return self.unigram_counts[word_id]
+        return 0
+
+    def row(self, w1_id):
+        """(start, end) slice of the successors/counts arrays for w1 (empty if unseen)."""
+        if 0 <= w1_id < len(self.row_offsets) - 1:
+            return self.row_offsets[w1_id], self.row_offsets[w1_id + 1]
+        return 0, 0
+
+    def count(self, w1_id, w2_id):
+        """Count(w1, w2). Rows are sorted by count, so this is a scan of one row."""
+        start, end = self.row(w1_id)
+        for i in range(start, end):
+            if self.successors[i] == w2_id:
+                return self.counts[i]
+        return 0
+
+    def prob(self, w1_id, w2_id):
+        """P(w2 | w1) = Count(w1, w2) / Count(w1), derived on demand."""
+        count = self.count(w1_id, w2_id)
+        return count / self.unigram_counts[w1_id] if count else 0.0
+
+    def successors_of(self, w1_id):
+        """Yields (w2_id, count) pairs, most frequent first."""
+        start, end = self.row(w1_id)
+        for i in range(start, end):
+            yield self.successors[i], self.counts[i]
+
+    def row_dict(self, w1_id):
+        """{w2_id: count} for one row (handy when ranking many candidates)."""
+        start, end = self.row(w1_id)
+        return dict(zip(self.successors[start:end], self.counts[start:end]))
+
+    def sort_rows_by_word(self, word_of):
+        """Builds word_order (see THEORY) for every row. word_of: word_id -> word."""
+        successors = self.successors
+        word_order = array.array('I')
+        for w1_id in range(len(self.row_offsets) - 1):
+            start, end = self.row(w1_id)
+            word_order.extend(sorted(range(end - start), key=lambda i: word_of(successors[start + i])))
+        self.word_order = word_order
+        return self
+
+    def row_with_prefix(self, w1_id, prefix, word_of):
+        """
+        {w2_id: count} of the successors of w1 whose word starts with 'prefix':
+        O(log |row|) to find the slice in word_order, then O(size of the slice).
+        """
+        if not prefix:
+            return self.row_dict(w1_id)
+        start, end = self.row(w1_id)
+        successors, word_order = self.successors, self.word_order
+
+        def word_at(i):
+            return word_of(successors[start + word_order[start + i]])
+
+        offsets = range(end - start)
+        lo = bisect.bisect_left(offsets, prefix, key=word_at)
+        hi = bisect.bisect_left(offsets, prefix + "\U0010ffff", lo, key=word_at)
+        counts = self.counts
+        return {successors[start + i]: counts[start + i] for i in word_order[start + lo:start + hi]}
+
+    def num_bigrams(self):
+        return len(self.successors)
+
+    def nbytes(self):
+        arrays = (self.unigram_counts, self.row_offsets, self.successors, self.counts, self.word_order)
+        return sum(len(values) * values.itemsize for values in arrays if values is not None)
+
+    def merged(self, pending_unigrams, staged_pairs, num_words, tie_key, scale=1):
+        """
+        Returns a NEW matrix = this matrix + the staged counts.
+        pending_unigrams: {word_id: count}
+        staged_pairs:     (pair_key, count), unique keys in ascending order, e.g. merge_runs()
+                          (pair_key = (w1_id << 32) | w2_id, so rows come one by one)
+        tie_key:          word_id -> word, used to break count ties in a row
+                          (and to sort the rebuilt rows' word_order)
+        scale:            multiplies the EXISTING counts first (exponential decay).
+        Only rows with staged pairs are rebuilt; the runs of untouched rows in
+        between are copied in bulk (with scale != 1 every row changes, though).
+        Staged counts may be fractional (decayed online observations): sums are
+        rounded to whole counts, and bigrams that round to 0 are dropped.
+        """
+        if scale == 1:
+            unigram_counts = array.array('Q', self.unigram_counts)
+            unigram_counts.extend([0] * (num_words - len(unigram_counts)))
+            for word_id, count in pending_unigrams.items():
+                unigram_counts[word_id] = round(unigram_counts[word_id] + count)
+        else:
+            totals = [count * scale for count in self.unigram_counts]
+            totals.extend([0] * (num_words - len(totals)))
+            for word_id, count in pending_unigrams.items():
+                totals[word_id] += count
+            unigram_counts = array.array('Q', (round(total) for total in totals))
+
+        if self.word_order is None:
+            self.sort_rows_by_word(tie_key)
+        old_rows = len(self.row_offsets) - 1
+        row_offsets = array.array('Q', [0])
+        successors = array.array('I')
+        counts = array.array('Q')
+        word_order = array.array('I')
+
+        def rebuild(w1_id, staged):
+            row = {key & PAIR_MASK: count for key, count in staged}  # Keys are unique
+            start, end = self.row(w1_id)
+            for w2_id, count in zip(self.successors[start:end], self.counts[start:end]):
+                row[w2_id] = row.get(w2_id, 0) + count * scale
+            rounded = [(w2_id, round(count)) for w2_id, count in row.items()]
+            ranked = sorted((x for x in rounded if x[1] > 0), key=lambda x: (-x[1], tie_key(x[0])))
+            successors.extend(w2_id for w2_id, _ in ranked)
+            counts.extend(count for _, count in ranked)
+            word_order.extend(sorted(range(len(ranked)), key=lambda i: tie_key(ranked[i][0])))
+            row_offsets.append(len(successors))
+
+        def copy_rows(lo, hi):
+            """Emits the untouched rows [lo, hi)."""
+            top = min(hi, old_rows)
+            if scale != 1:
+                for w1_id in range(lo, top):
+                    rebuild(w1_id, ())
+            elif lo < top:
+                # Already sorted: one slice per array, offsets shifted to their new position
+                start, end = self.row_offsets[lo], self.row_offsets[top]
+                shift = len(successors) - start
+                row_offsets.extend(offset + shift for offset in self.row_offsets[lo + 1:top + 1])
+                successors.extend(self.successors[start:end])
+                counts.extend(self.counts[start:end])
+                word_order.extend(self.word_order[start:end])  # Offsets are row-relative
+            row_offsets.extend([len(successors)] * (hi - max(lo, top)))  # Rows of brand-new words
+
+        next_row = 0
+        for w1_id, staged in itertools.groupby(staged_pairs, key=lambda pair: pair[0] >> PAIR_SHIFT):
+            copy_rows(next_row, w1_id)
+            rebuild(w1_id, staged)
+            next_row = w1_id + 1
+        copy_rows(next_row, num_words)
+
+        return BigramMatrix(unigram_counts, row_offsets, successors, counts, word_order)
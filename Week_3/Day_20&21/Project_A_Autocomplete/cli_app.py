@@ -1,4 +1,5 @@
 import os
+import sys
 from autocomplete_engine import AutocompleteEngine
 
 def load_sample_corpus():
@@ -19,17 +20,35 @@ def load_sample_corpus():
     Software engineering practices ensure reliable systems.
     """
 
-def run_cli():
-    print("Initializing Autocomplete Engine...")
-    engine = AutocompleteEngine()
-    
+def load_engine(model_path=None):
+    """
+    Loads a saved snapshot if one exists (near-instant, memory-mapped).
+    Otherwise trains from the sample corpus and saves the snapshot for next time.
+    """
+    if model_path and os.path.exists(model_path):
+        print(f"Loading snapshot '{model_path}'...")
+        return AutocompleteEngine.load(model_path)
+
+    # top_k: every trie node keeps its best completions, so the top-3 below
+    # costs O(k) even for a one-letter prefix
+    engine = AutocompleteEngine(top_k=10)
     corpus = load_sample_corpus()
     engine.train(corpus)
+    if model_path:
+        engine.save(model_path)
+        print(f"Snapshot saved to '{model_path}'.")
+    return engine
+
+def run_cli(model_path=None):
+    print("Initializing Autocomplete Engine...")
+    engine = load_engine(model_path)
+    shown_context, shown = "", []  # The last suggestions displayed (for '!N')
     
     print("\n=================================================")
     print("🚀 Autocomplete CLI Online [Phase 2 Project]")
     print("Type a sentence. The engine will use the previous word")
     print("as the 'state' and the current word as the 'prefix'.")
+    print("Type '!1'..'!3' to accept a suggestion (the engine learns from it).")
     print("Type 'EXIT' to quit.")
     print("=================================================\n")
     
@@ -43,27 +62,44 @@ def run_cli():
                 break
             if not user_input:
                 continue
+            if user_input.startswith('!') and user_input[1:].isdigit():
+                choice = int(user_input[1:]) - 1
+                if not 0 <= choice < len(shown):
+                    print("   [Nothing to accept with that number]")
+                elif not shown_context:
+                    # observe() counts (context -> word) transitions: a first word has none
+                    print(f"   [Nothing learned: '{shown[choice]}' has no previous word]")
+                else:
+                    # Online learning: O(word length), no retraining
+                    engine.observe(shown_context, shown[choice])
+                    print(f"   [Learned: '{shown_context} {shown[choice]}']")
+                continue
                 
             # Tokenize the input to find context and prefix
             words = user_input.split()
             
             if len(words) == 1:
-                context = ""  # No history, essentially a Unigram model
-                prefix = words
+                context = ""  # No history: ranked by the Unigram model
+                prefix = words[0]
             else:
                 context = words[-2] # The word immediately preceding the current typing
                 prefix = words[-1]  # The word currently being typed
             
-            # Query the engine
-            suggestions = engine.suggest(context, prefix)
+            # Query the engine (falling back to typo-tolerant matching)
+            suggestions = engine.suggest(context, prefix, k=3)
+            if not suggestions:
+                suggestions = engine.suggest_fuzzy(context, prefix, max_dist=1, k=3)
+                if suggestions:
+                    print(f"   [No exact match for '{prefix}'. Did you mean...]")
             
             # Apply Decision Theory: Maximize Expected Utility by showing Top 3
+            shown_context, shown = context, [word for word, _ in suggestions[:3]]
             if suggestions:
                 print(f"   [Predictions for '{prefix}' following '{context} भी']: ")
                 # Display only the top 3 most probable suggestions
                 for word, prob in suggestions[:3]:
-                    # If prob is 0.0, it means it's mathematically possible via Trie, 
-                    # but never seen together in Markov Chain.
+                    # Words never seen after the context are scored by the Unigram
+                    # model instead (backoff), so a rare pairing still ranks sensibly
                     print(f"   -> {word:<15} (Confidence: {prob:.2%})")
             else:
                 print(f"   [No suggestions found in vocabulary for '{prefix}']")
@@ -76,4 +112,5 @@ def run_cli():
 # EXECUTION
 # ==========================================
 if __name__ == "__main__":
-    run_cli()
\ No newline at end of file
+    # Optional: python cli_app.py model.bin  -> reuse a saved snapshot across runs
+    run_cli(sys.argv[1] if len(sys.argv) > 1 else None)
\ No newline at end of file
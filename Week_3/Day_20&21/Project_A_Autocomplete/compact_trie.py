@@ -0,0 +1,197 @@
+import array
+import bisect
+import collections
+import heapq
+
+# ==========================================
+# THEORY: Array-Backed (LOUDS-style) Trie
+# ==========================================
+# The node-based Trie allocates one Python object + one dict per character.
+# Here we store the SAME tree as a handful of flat typed arrays instead:
+#
+#   * Nodes are numbered in Breadth-First (level) order, root = 0.
+#     In level order, all children of a node are CONTIGUOUS, so we only
+#     need one offset per node (exactly like a CSR sparse matrix row pointer).
+#   * first_child[i] .. first_child[i + 1] - 1  -> the children of node i
+#   * labels[i]   -> the (interned) character on the edge INTO node i
+#   * is_end[i]   -> 1 if the path root..i spells a complete word
+#
+# Characters are interned into a small sorted alphabet, so each edge label
+# costs 1-4 bytes and sibling labels are sorted -> Binary Search lookup.
+
+def _label_typecode(alphabet_size):
+    """Smallest unsigned array typecode able to hold every label id."""
+    if alphabet_size < 2 ** 8:
+        return 'B'
+    if alphabet_size < 2 ** 16:
+        return 'H'
+    return 'I'
+
+
+class CompactTrie:
+    """A static Prefix Tree stored in flat arrays (built once from a word list)."""
+    def __init__(self, words=()):
+        words = sorted(set(words))
+
+        # 1. Intern the alphabet: char -> small integer id (sorted by code point)
+        self.alphabet = "".join(sorted({char for word in words for char in word}))
+        self._char_ids = {char: i for i, char in enumerate(self.alphabet)}
+
+        self.first_child = array.array('I')
+        self.labels = array.array(_label_typecode(len(self.alphabet)))
+        self.is_end = bytearray()
+
+        # Optional per-node Top-K completion lists, flattened like first_child:
+        # top_words[top_offsets[i] : top_offsets[i + 1]] -> best completions below node i
+        self.top_offsets = None
+        self.top_words = None
+
+        self._build(words)
+
+    @classmethod
+    def from_arrays(cls, alphabet, first_child, labels, is_end):
+        """Wraps already-built arrays (e.g. memory-mapped from a snapshot) without copying."""
+        trie = cls.__new__(cls)
+        trie.alphabet = alphabet
+        trie._char_ids = {char: i for i, char in enumerate(alphabet)}
+        trie.first_child = first_child
+        trie.labels = labels
+        trie.is_end = is_end
+        trie.top_offsets = None
+        trie.top_words = None
+        return trie
+
+    def _build(self, words):
+        """
+        Breadth-First construction over the SORTED word list.
+        Every node is represented by the slice words[lo:hi] sharing its prefix,
+        so the children of a node are just the runs of equal characters at 'depth'.
+        """
+        queue = collections.deque([(0, len(words), 0, 0)])  # (lo, hi, depth, label)
+        next_free = 1  # Node 0 is the root
+
+        while queue:
+            lo, hi, depth, label = queue.popleft()
+            self.labels.append(label)
+            self.first_child.append(next_free)
+
+            # Sorted order guarantees the word that ENDS here is first in its slice
+            if lo < hi and len(words[lo]) == depth:
+                self.is_end.append(1)
+                lo += 1
+            else:
+                self.is_end.append(0)
+
+            # Group the remaining words by their next character
+            while lo < hi:
+                char = words[lo][depth]
+                end = lo + 1
+                while end < hi and words[end][depth] == char:
+                    end += 1
+                queue.append((lo, end, depth + 1, self._char_ids[char]))
+                next_free += 1
+                lo = end
+
+        # Sentinel so first_child[i + 1] is always valid
+        self.first_child.append(next_free)
+
+    def __len__(self):
+        """Number of nodes in the tree."""
+        return len(self.labels)
+
+    # ==========================================
+    # LOOKUPS
+    # ==========================================
+    def _child(self, node, char):
+        """O(log |alphabet|) - Binary Search over the sorted sibling labels."""
+        label = self._char_ids.get(char)
+        if label is None:
+            return -1
+        lo, hi = self.first_child[node], self.first_child[node + 1]
+        i = bisect.bisect_left(self.labels, label, lo, hi)
+        if i < hi and self.labels[i] == label:
+            return i
+        return -1
+
+    def _find_node(self, prefix):
+        node = 0
+        for char in prefix:
+            node = self._child(node, char)
+            if node < 0:
+                return -1
+        return node
+
+    def search(self, word):
+        node = self._find_node(word)
+        return node >= 0 and self.is_end[node] == 1
+
+    def words_with_prefix(self, prefix):
+        """Returns all words that start with 'prefix', in lexicographic order."""
+        node = self._find_node(prefix)
+        if node < 0:
+            return []
+        return self.words_below(node, prefix)
+
+    def words_below(self, node, prefix):
+        """All words in the subtree of 'node' (whose path spells 'prefix')."""
+        return list(self.iter_words_below(node, prefix))
+
+    def iter_words_below(self, node, prefix):
+        """
+        Lazily yields the words below 'node' in lexicographic order.
+        Iterative DFS with an explicit stack (children pushed in reverse so the
+        smallest label is popped first). The path lives in ONE shared char buffer,
+        so a string is only built when a word is actually yielded.
+        """
+        path = list(prefix)
+        stack = [(node, len(path), None)]
+        while stack:
+            node, depth, char = stack.pop()
+            del path[depth:]
+            if char is not None:
+                path.append(char)
+            if self.is_end[node]:
+                yield "".join(path)
+            for child in range(self.first_child[node + 1] - 1, self.first_child[node] - 1, -1):
+                stack.append((child, len(path), self.alphabet[self.labels[child]]))
+
+    def top_completions(self, node):
+        """The precomputed Top-K completions below 'node' (best first)."""
+        return self.top_words[self.top_offsets[node]:self.top_offsets[node + 1]]
+
+    def build_top_completions(self, k, score):
+        """
+        Precomputes the best 'k' words (highest score(word)) below every node.
+        Level order means every child has a LARGER id than its parent, so one
+        reverse sweep over the node ids is a valid bottom-up (post-order) pass.
+        """
+        # Forward sweep: the word spelled by every terminal node
+        paths = [""] * len(self)
+        for node in range(len(self)):
+            for child in range(self.first_child[node], self.first_child[node + 1]):
+                paths[child] = paths[node] + self.alphabet[self.labels[child]]
+
+        # Reverse sweep: merge the children's lists into the parent's list
+        best = [None] * len(self)
+        for node in range(len(self) - 1, -1, -1):
+            candidates = [paths[node]] if self.is_end[node] else []
+            for child in range(self.first_child[node], self.first_child[node + 1]):
+                candidates.extend(best[child])
+            best[node] = heapq.nsmallest(k, candidates, key=lambda w: (-score(w), w))
+
+        # Flatten into one offset array + one list of (shared) word strings
+        self.top_offsets = array.array('I', [0])
+        self.top_words = []
+        for node in range(len(self)):
+            self.top_words.extend(best[node])
+            self.top_offsets.append(len(self.top_words))
+
+    def words(self):
+        """All words stored in the Trie (used to rebuild it with new vocabulary)."""
+        return self.words_with_prefix("")
+
+    def nbytes(self):
+        """Bytes used by the structural arrays (excluding the tiny alphabet string)."""
+        return (self.first_child.itemsize * len(self.first_child)
+                + self.labels.itemsize * len(self.labels)
+                + len(self.is_end))
@@ -0,0 +1,616 @@
+import heapq
+import itertools
+import math
+import sys
+
+from fuzzy_search import fuzzy_prefix_matches
+
+# ==========================================
+# THEORY: Copy-on-Write Model Versions
+# ==========================================
+# Retraining used to mutate the live trie and swap the bigram matrix piece by
+# piece, so a suggest() running at the same time could read a new vocabulary
+# with an old matrix, or a trie node whose Top-K list was half rebuilt.
+#
+# Instead, every training run BUILDS a new FrozenModel next to the live one:
+#   * vocab / bigrams -> fresh objects (BigramMatrix.merged() never mutates)
+#   * compact trie    -> rebuilt arrays (or a shallow copy sharing them)
+#   * node trie       -> PATH COPYING: only the nodes on the path of a new word
+#                        are copied; every untouched subtree is shared
+# and then publishes it with ONE attribute assignment (atomic in Python).
+# A reader grabs `model = engine.model` once and works on that version to the
+# end of its request, without any lock. Old versions are freed by the garbage
+# collector once the last reader lets go of them.
+#
+# RANKING WITH BACKOFF: a candidate never seen after the context used to score
+# 0.0, leaving the order arbitrary (and a context-free query ranked nothing).
+# "Stupid Backoff" (Brants et al., 2007) scores it from the unigram model:
+#     score(w | c) = P(w | c)          if Count(c, w) > 0
+#                  = backoff * P(w)    otherwise, with P(w) = Count(w) / N
+# For an empty or unseen context there is nothing to back off from: the
+# score is P(w) itself. Scores are relative weights, not a distribution.
+
+# Weight of the unigram score for a word never seen after the context
+BACKOFF_WEIGHT = 0.4
+
+
+class TrieNode:
+    """A single node in the Prefix Tree."""
+    def __init__(self):
+        self.children = {}
+        self.is_end_of_word = False
+        # Best completions below this node (only filled when top_k mode is on)
+        self.top_completions = None
+
+    def copy(self):
+        """Shallow copy: same children (shared), own children dict."""
+        node = TrieNode()
+        node.children = dict(self.children)
+        node.is_end_of_word = self.is_end_of_word
+        node.top_completions = self.top_completions
+        return node
+
+def insert_words(root, words, copy_all=False):
+    """
+    Returns a NEW root = 'root' + 'words'; 'root' itself is never modified.
+    copy_all=False: path copying (nodes off the new words' paths stay shared).
+    copy_all=True:  every node is copied (when every node is about to be rewritten anyway).
+    """
+    if root is None:
+        root = TrieNode()
+    if copy_all:
+        new_root = root.copy()
+        stack = [new_root]
+        while stack:
+            node = stack.pop()
+            for char, child in node.children.items():
+                node.children[char] = child = child.copy()
+                stack.append(child)
+        owned = None
+    else:
+        new_root = root.copy()
+        owned = {id(new_root)}  # Nodes created by THIS build (safe to modify)
+
+    for word in words:
+        node = new_root
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                child = TrieNode()
+            elif owned is not None and id(child) not in owned:
+                child = child.copy()
+            else:
+                node = child
+                continue
+            if owned is not None:
+                owned.add(id(child))
+            node.children[char] = child
+            node = child
+        node.is_end_of_word = True
+    return new_root
+
+def iter_node_words(node, prefix):
+    """Lazily yields the words below a TrieNode in lexicographic order."""
+    # Explicit stack instead of recursion (no depth limit for long tokens), and
+    # ONE shared char buffer: a string is only built for a word that is yielded
+    path = list(prefix)
+    stack = [(node, len(path), None)]
+    while stack:
+        node, depth, char = stack.pop()
+        del path[depth:]
+        if char is not None:
+            path.append(char)
+        if node.is_end_of_word:
+            yield "".join(path)
+        for next_char in sorted(node.children, reverse=True):
+            stack.append((node.children[next_char], len(path), next_char))
+
+
+class FrozenModel:
+    """
+    One immutable version of the trained model (vocabulary + bigram matrix + trie)
+    with every read-only query on it. Never modified once published, apart from
+    the increment-only OnlineCounts overlay shared with the versions observe()
+    derives from it (see online_counts.py).
+    """
+    def __init__(self, vocab, bigrams, trie_backend, root=None, compact_trie=None,
+                 top_k=None, version=0, mapped=None, online=None, online_root=None,
+                 backoff=BACKOFF_WEIGHT):
+        self.vocab = vocab
+        self.bigrams = bigrams
+        self.trie_backend = trie_backend
+        self.root = root
+        self.compact_trie = compact_trie
+        self.top_k = top_k
+        self.version = version
+        self.backoff = backoff
+        self._base_total = None  # N = sum of the unigram counts (computed on first use)
+        if bigrams.word_order is None:
+            # Matrices built without it (pruning, sharding): sort the rows ONCE, at build time
+            bigrams.sort_rows_by_word(vocab.word)
+        # The memory-mapped snapshot backing this model (holding it keeps the mmap alive)
+        self.mapped = mapped
+        # Observations since the last build: counts + a small node trie of every
+        # word they touched (new words, and words whose frequency rank changed)
+        self.online = online
+        self.online_root = online_root
+
+    def with_online(self, online, online_root):
+        """The next version: same base model, new overlay state. O(1)."""
+        model = FrozenModel(self.vocab, self.bigrams, self.trie_backend, root=self.root,
+                            compact_trie=self.compact_trie, top_k=self.top_k, version=self.version + 1,
+                            mapped=self.mapped, online=online, online_root=online_root,
+                            backoff=self.backoff)
+        model._base_total = self._base_total  # Same base counts: don't re-sum them
+        return model
+
+    def word_id(self, word):
+        """Id in the base vocabulary or the online overlay (-1 if unknown)."""
+        word_id = self.vocab.id(word)
+        if word_id < 0 and self.online is not None:
+            word_id = self.online.ids.get(word, -1)
+        return word_id
+
+    def word(self, word_id):
+        if word_id < len(self.vocab):
+            return self.vocab.word(word_id)
+        return self.online.words[word_id - self.online.first_id]
+
+    # ==========================================
+    # TRIE OPERATIONS
+    # ==========================================
+    # With an online overlay, a node is a (base node, overlay node, path) triple
+    # and either node may be None: the two tries are walked in lockstep.
+    def find_node(self, prefix):
+        """Walks down the trie. Returns the node for 'prefix' (None if absent)."""
+        node = self._base_find_node(prefix)
+        if self.online_root is None:
+            return node
+        extra = self.online_root
+        for char in prefix:
+            extra = extra.children.get(char)
+            if extra is None:
+                break
+        return None if node is None and extra is None else (node, extra, prefix)
+
+    def _base_find_node(self, prefix):
+        if self.trie_backend == "compact":
+            node = self.compact_trie._find_node(prefix)
+            return node if node >= 0 else None
+
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def trie_child(self, node, char):
+        """One step down the trie (None if there is no such edge)."""
+        if self.online_root is None:
+            return self._base_child(node, char)
+        node, extra, path = node
+        child = None if node is None else self._base_child(node, char)
+        extra = None if extra is None else extra.children.get(char)
+        return None if child is None and extra is None else (child, extra, path + char)
+
+    def _base_child(self, node, char):
+        if self.trie_backend == "compact":
+            child = self.compact_trie._child(node, char)
+            return child if child >= 0 else None
+        return node.children.get(char)
+
+    def trie_children(self, node):
+        """Yields (char, child) for every edge below 'node'."""
+        if self.online_root is None:
+            yield from self._base_children(node)
+            return
+        node, extra, path = node
+        children = {}
+        if node is not None:
+            for char, child in self._base_children(node):
+                children[char] = (child, None, path + char)
+        if extra is not None:
+            for char, child in extra.children.items():
+                children[char] = (children.get(char, (None,))[0], child, path + char)
+        for char in sorted(children):
+            yield char, children[char]
+
+    def _base_children(self, node):
+        if self.trie_backend == "compact":
+            trie = self.compact_trie
+            for child in range(trie.first_child[node], trie.first_child[node + 1]):
+                yield trie.alphabet[trie.labels[child]], child
+        else:
+            yield from node.children.items()
+
+    def is_word(self, node):
+        if self.online_root is None:
+            return self._base_is_word(node)
+        node, extra, _ = node
+        return ((node is not None and self._base_is_word(node))
+                or (extra is not None and extra.is_end_of_word))
+
+    def _base_is_word(self, node):
+        if self.trie_backend == "compact":
+            return self.compact_trie.is_end[node] == 1
+        return node.is_end_of_word
+
+    def top_completions(self, node):
+        if self.online_root is None:
+            return self._base_top_completions(node)
+        # Only words in the overlay trie changed rank since the lists were built,
+        # so (old Top-K + those words) re-ranked with today's counts is exact
+        node, extra, path = node
+        candidates = set() if node is None else set(self._base_top_completions(node))
+        if extra is not None:
+            candidates.update(iter_node_words(extra, path))
+        return heapq.nsmallest(self.top_k, candidates, key=self.unigram_rank)
+
+    def _base_top_completions(self, node):
+        if self.trie_backend == "compact":
+            return self.compact_trie.top_completions(node)
+        return node.top_completions
+
+    def words_with_prefix(self, prefix):
+        """Returns all words in the Trie that start with 'prefix'."""
+        node = self.find_node(prefix)
+        if node is None:
+            return [] # Prefix not found
+        return self.words_below(node, prefix)
+
+    def words_below(self, node, prefix):
+        """All words in the subtree of an already-located trie node."""
+        return list(self.iter_words_below(node, prefix))
+
+    def iter_words_below(self, node, prefix):
+        """Lazily yields the words below 'node' in lexicographic order."""
+        if self.online_root is not None:
+            node, extra, _ = node
+            if extra is not None:
+                # Both sides are sorted: merge them, skipping words present in both
+                base = () if node is None else self._iter_base_words(node, prefix)
+                previous = None
+                for word in heapq.merge(base, iter_node_words(extra, prefix)):
+                    if word != previous:
+                        yield word
+                    previous = word
+                return
+            if node is None:
+                return
+        yield from self._iter_base_words(node, prefix)
+
+    def _iter_base_words(self, node, prefix):
+        if self.trie_backend == "compact":
+            return self.compact_trie.iter_words_below(node, prefix)
+        return iter_node_words(node, prefix)
+
+    def iter_completions(self, prefix, order="lex"):
+        """
+        Lazily yields every word starting with 'prefix', so a caller that only
+        needs a few (islice, break) never enumerates the whole subtree.
+        order="lex":  alphabetical.
+        order="freq": most frequent first (ties alphabetical).
+        """
+        node = self.find_node(prefix)
+        if node is None:
+            return
+        if order == "lex":
+            yield from self.iter_words_below(node, prefix)
+        elif self.top_k is None:
+            # No per-node bounds to prune with: one full scan, then sort
+            yield from sorted(self.iter_words_below(node, prefix), key=self.unigram_rank)
+        else:
+            yield from self._iter_by_frequency(node, prefix)
+
+    def _iter_by_frequency(self, node, prefix):
+        """
+        The node's own Top-K list IS the start of the answer: it is yielded as-is,
+        and the trie is only searched when a caller wants more than top_k words.
+        """
+        top = self.top_completions(node)
+        yield from top
+        if len(top) == self.top_k:  # Shorter: the list already holds the whole subtree
+            yield from itertools.islice(self._walk_by_frequency(node, prefix, top), len(top), None)
+
+    def _walk_by_frequency(self, node, prefix, top):
+        """
+        Best-first search. The head of a node's Top-K list is the best word in
+        its whole subtree, so it is an EXACT bound: once a word pops off the heap,
+        nothing still unexplored can outrank it.
+        Paths are linked (parent_path, char) pairs, joined only for terminal nodes.
+        """
+        heap = [(self.unigram_rank(top[0]), 0, node, (None, prefix))]
+        tiebreak = itertools.count(1)  # Keeps the heap from ever comparing two nodes
+        while heap:
+            rank, _, node, path = heapq.heappop(heap)
+            if node is None:
+                yield rank[1]
+                continue
+            if self.is_word(node):
+                word = self._join_path(path)
+                heapq.heappush(heap, (self.unigram_rank(word), next(tiebreak), None, None))
+            for char, child in self.trie_children(node):
+                top = self.top_completions(child)
+                if top:
+                    heapq.heappush(heap, (self.unigram_rank(top[0]), next(tiebreak), child, (path, char)))
+
+    @staticmethod
+    def _join_path(path):
+        chars = []
+        while path is not None:
+            path, char = path
+            chars.append(char)
+        return "".join(reversed(chars))
+
+    def build_top_completions(self):
+        """
+        Stores the 'top_k' most frequent completions on every trie node, so
+        suggest() can stop early. Only called while the model is being built
+        (before it is published), never on a live model.
+        """
+        if self.trie_backend == "compact":
+            self.compact_trie.build_top_completions(self.top_k, self.unigram_count)
+            return
+
+        # Iterative post-order traversal: a node is finalized after all its children
+        stack = [(self.root, "", False)]
+        while stack:
+            node, path, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, path, True))
+                for char, child in node.children.items():
+                    stack.append((child, path + char, False))
+                continue
+            candidates = [path] if node.is_end_of_word else []
+            for child in node.children.values():
+                candidates.extend(child.top_completions)
+            node.top_completions = heapq.nsmallest(self.top_k, candidates, key=self.unigram_rank)
+
+    def nbytes(self):
+        """Approximate bytes held by this version: CSR arrays + vocabulary + trie (+ Top-K lists)."""
+        total = self.bigrams.nbytes() + self.vocab.nbytes()
+        if self.trie_backend == "compact":
+            trie = self.compact_trie
+            total += trie.nbytes()
+            if trie.top_offsets is not None:
+                total += 4 * len(trie.top_offsets) + sys.getsizeof(trie.top_words)
+            return total
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            total += sys.getsizeof(node) + sys.getsizeof(node.__dict__) + sys.getsizeof(node.children)
+            if node.top_completions is not None:
+                total += sys.getsizeof(node.top_completions)
+            stack.extend(node.children.values())
+        return total
+
+    # ==========================================
+    # MODEL LOOKUPS
+    # ==========================================
+    def unigram_rank(self, word):
+        """Sort key: most frequent first, alphabetical among ties."""
+        return (-self.unigram_count(word), word)
+
+    def unigram_count(self, word):
+        word_id = self.word_id(word)
+        count = self.bigrams.unigram(word_id)
+        online = self.online
+        if online is None:
+            return count
+        # With decay these are relative weights: only their ratios are meaningful
+        return count * online.base_scale + online.unigrams.get(word_id, 0)
+
+    def total_count(self):
+        """N: the number of counted tokens (the P(w) denominator)."""
+        if self._base_total is None:
+            self._base_total = sum(self.bigrams.unigram_counts)
+        online = self.online
+        if online is None:
+            return self._base_total
+        return self._base_total * online.base_scale + online.total
+
+    def unigram_prob(self, word):
+        """P(word) = Count(word) / N."""
+        count = self.unigram_count(word)  # Numerator first (see online_counts.py)
+        return count / self.total_count() if count else 0.0
+
+    def bigram_count(self, w1, w2):
+        w1_id, w2_id = self.word_id(w1), self.word_id(w2)
+        if w1_id < 0 or w2_id < 0:
+            return 0
+        count = self.bigrams.count(w1_id, w2_id)
+        online = self.online
+        if online is None:
+            return count
+        return count * online.base_scale + online.rows.get(w1_id, {}).get(w2_id, 0)
+
+    def bigram_prob(self, w1, w2):
+        """P(w2 | w1), computed from the counts on demand."""
+        if self.online is None:
+            w1_id, w2_id = self.vocab.id(w1), self.vocab.id(w2)
+            if w1_id < 0 or w2_id < 0:
+                return 0.0
+            return self.bigrams.prob(w1_id, w2_id)
+        count = self.bigram_count(w1, w2)  # Numerator first (see online_counts.py)
+        return count / self.unigram_count(w1) if count else 0.0
+
+    def successors(self, word):
+        """Yields (next_word, P(next_word | word)), most probable first."""
+        word_id = self.word_id(word)
+        online = self.online
+        online_row = online.rows.get(word_id) if online is not None else None
+        if not online_row:
+            # Untouched since the last build: the CSR row is already sorted
+            total = self.bigrams.unigram(word_id)
+            for w2_id, count in self.bigrams.successors_of(word_id):
+                yield self.word(w2_id), count / total
+            return
+
+        scale = online.base_scale
+        row = {w2_id: count * scale for w2_id, count in self.bigrams.successors_of(word_id)}
+        for w2_id, weight in list(online_row.items()):  # Numerator first (see online_counts.py)
+            row[w2_id] = row.get(w2_id, 0) + weight
+        total = self.bigrams.unigram(word_id) * scale + online.unigrams[word_id]
+        for w2, count in sorted(((self.word(w2_id), count) for w2_id, count in row.items()),
+                                key=lambda x: (-x[1], x[0])):
+            yield w2, count / total
+
+    # ==========================================
+    # RANKING
+    # ==========================================
+    def uses_top_k_path(self, k):
+        return k is not None and self.top_k is not None and k <= self.top_k
+
+    def _base_row(self, context_id, prefix=""):
+        """{next_id: count} of the context's BASE successors starting with 'prefix' (see word_order)."""
+        return self.bigrams.row_with_prefix(context_id, prefix, self.vocab.word) if context_id >= 0 else {}
+
+    def _context_scorer(self, context_word, prefix="", base_row=None):
+        """
+        score(word_id, word) -> backoff score of 'word' after 'context_word',
+        valid for words starting with 'prefix'. The context is looked up ONCE
+        (only the slice of its row matching the prefix, the overlay row is
+        copied), so each candidate costs one dict lookup.
+        """
+        context_id = self.word_id(context_word)
+        if base_row is None:
+            base_row = self._base_row(context_id, prefix)
+        online = self.online
+        online_row, scale = {}, 1
+        if online is not None:
+            online_row = dict(online.rows.get(context_id, {}))  # Numerators before the total
+            scale = online.base_scale
+        total = self.unigram_count(context_word)
+        weight = self.backoff if total else 1.0  # Nothing to back off from
+
+        def score(word_id, word):
+            count = base_row.get(word_id, 0) * scale + online_row.get(word_id, 0) if total else 0
+            # P(word | context), backing off to the unigram model if never seen together
+            return count / total if count else weight * self.unigram_prob(word)
+        return score
+
+    def rank_suggestions(self, context_word, partial_word, k, candidates=None):
+        """
+        The uncached suggest() logic. 'candidates' (a precomputed trie walk)
+        lets callers reuse earlier work. O(|candidates|) after one context lookup.
+        """
+        if self.uses_top_k_path(k):
+            return self.suggest_top_k(context_word, partial_word, k)
+
+        # Step 1: Get all mathematically possible words from the Trie
+        if candidates is None:
+            candidates = self.words_with_prefix(partial_word)
+
+        # Step 2: Rank them using our Markov Chain probabilities (one id lookup each)
+        score = self._context_scorer(context_word, partial_word)
+        ranked_suggestions = [(cand, score(self.word_id(cand), cand)) for cand in candidates]
+
+        # Step 3: Sort by highest score first (ties alphabetical, like the Top-K path)
+        ranked_suggestions.sort(key=lambda x: (-x[1], x[0]))
+        return ranked_suggestions if k is None else ranked_suggestions[:k]
+
+    def suggest_fuzzy(self, context_word, partial_word, max_dist=1, k=None):
+        """
+        Typo-tolerant suggest(): completions of any prefix within 'max_dist'
+        edits of 'partial_word' (see fuzzy_search.py), ranked by the backoff score,
+        then by edit distance (exact prefix matches first).
+        """
+        matches = fuzzy_prefix_matches(self, partial_word, max_dist)
+        score = self._context_scorer(context_word)
+        scored = [(cand, score(self.word_id(cand), cand), dist) for cand, dist in matches.items()]
+        scored.sort(key=lambda x: (-x[1], x[2], x[0]))
+        suggestions = [(cand, score) for cand, score, _ in scored]
+        return suggestions if k is None else suggestions[:k]
+
+    def suggest_top_k(self, context_word, partial_word, k, node=None):
+        """
+        Early-stopping merge of two streams, both ordered by (-score, word):
+          1. "Seen": the context's successors that start with the prefix, i.e.
+             ONE bisected slice of the row's word_order (see bigram_model.py)
+             plus the matching overlay entries, heapified by P(cand | context).
+          2. "Unseen": the prefix's completions by frequency, a best-first walk
+             over the precomputed Top-K lists, scored backoff * P(cand).
+        The first k merged items are exactly the k best, whatever the context
+        (none, unseen or known). A stream-2 word that was seen after the context
+        is skipped (stream 1 scores it), checked by id only once it would win.
+        Cost: O(log |row| + m + k log m) for stream 1, where m is the number of
+        successors starting with the prefix (not the row length), plus the
+        frequency walk, which stops after about k words.
+        """
+        if node is None:
+            node = self.find_node(partial_word)
+        if node is None:
+            return []
+
+        context_id = self.word_id(context_word)
+        online = self.online
+        online_row = dict(online.rows.get(context_id, {})) if online is not None else {}
+        base_row = self._base_row(context_id, partial_word)
+        matching = set(base_row)
+        matching.update(next_id for next_id in online_row if self.word(next_id).startswith(partial_word))
+
+        score = self._context_scorer(context_word, partial_word, base_row)
+        seen = [(-score(next_id, word), word) for next_id, word in ((i, self.word(i)) for i in matching)]
+        heapq.heapify(seen)
+        weight = self.backoff if self.unigram_count(context_word) else 1.0
+        unseen = ((-weight * self.unigram_prob(cand), cand) for cand in self._iter_by_frequency(node, partial_word))
+        best_seen = heapq.heappop(seen) if seen else None
+        best_unseen = next(unseen, None)
+
+        suggestions = []
+        while len(suggestions) < k and (best_seen is not None or best_unseen is not None):
+            if best_unseen is None or (best_seen is not None and best_seen < best_unseen):
+                suggestions.append(best_seen)
+                best_seen = heapq.heappop(seen) if seen else None
+                continue
+            # Every completion starts with the prefix: the slice holds all its followers
+            word_id = self.word_id(best_unseen[1])
+            if word_id not in base_row and word_id not in online_row:
+                suggestions.append(best_unseen)
+            best_unseen = next(unseen, None)
+        return [(cand, -neg_score) for neg_score, cand in suggestions]
+
+    # ==========================================
+    # PHRASE COMPLETION
+    # ==========================================
+    def complete_phrase(self, context_word, partial_word, max_words=3, beam_width=3):
+        """
+        Beam search over the bigram transitions: completes 'partial_word', then
+        extends it with up to max_words - 1 following words.
+        Only the 'beam_width' best partial phrases (by cumulative log-probability)
+        survive each step, and each is extended with at most 'beam_width'
+        successors, read straight off its CSR row (rows are already sorted, best
+        first). Cost: O(max_words * beam_width^2), whatever the vocabulary size.
+        Returns up to beam_width (phrase, probability) pairs, most probable first.
+        """
+        # Step 1: the word being typed (backoff scores, see rank_suggestions)
+        beam = [(math.log(score) if score > 0 else -math.inf, (cand,))
+                for cand, score in self.rank_suggestions(context_word, partial_word, beam_width)]
+        finished = []  # Phrases whose last word was never followed by anything
+
+        # Step 2: extend every phrase by one word, keep the best beam_width
+        # (a dead end moves to 'finished', so it is never in 'beam' as well)
+        for _ in range(max_words - 1):
+            candidates = []  # Min-heap: candidates[0] is the worst phrase kept so far
+            for log_prob, words in beam:
+                row = itertools.islice(self.successors(words[-1]), beam_width)
+                first = next(row, None)
+                if first is None:
+                    finished.append((log_prob, words))
+                    continue
+                for next_word, prob in itertools.chain((first,), row):
+                    score = log_prob + math.log(prob)
+                    if len(candidates) == beam_width and score <= candidates[0][0]:
+                        break  # The row is sorted: every later successor scores even lower
+                    if len(candidates) < beam_width:
+                        heapq.heappush(candidates, (score, words + (next_word,)))
+                    else:
+                        heapq.heapreplace(candidates, (score, words + (next_word,)))
+            beam = candidates
+            if not beam:
+                break
+
+        best = sorted(beam + finished, key=lambda x: (-x[0], x[1]))[:beam_width]
+        return [(" ".join(words), math.exp(log_prob)) for log_prob, words in best]
@@ -0,0 +1,55 @@
+# ==========================================
+# THEORY: Levenshtein Distance over a Trie
+# ==========================================
+# The spell checker in Day 13 compares the typo against EVERY word with a
+# full O(m * n) table. But words that share a prefix share the first rows
+# of that table, and a Trie stores every shared prefix exactly once.
+#
+# So we walk the Trie and carry ONE DP row per depth:
+#   row[i] = edit distance between query[:i] and the path spelled so far
+# Stepping down an edge labelled 'c' computes the next row in O(m) from the
+# parent's row (the same recurrence as levenshtein_distance, one row at a time).
+#
+# Two observations make it fast:
+#   1. row[-1] <= max_dist  -> the path is a fuzzy match of the WHOLE query,
+#      so every word below it is a valid completion.
+#   2. min(row) > max_dist  -> no extension can ever get back under the limit,
+#      so the whole branch is pruned without visiting it.
+
+def _next_row(row, query, char):
+    """One DP row down the trie edge labelled 'char'."""
+    new_row = [row[0] + 1]
+    for i in range(1, len(row)):
+        new_row.append(min(
+            row[i] + 1,                               # Insertion ('char' is extra)
+            new_row[i - 1] + 1,                       # Deletion (query char missing)
+            row[i - 1] + (query[i - 1] != char),      # Match / Replacement
+        ))
+    return new_row
+
+def fuzzy_prefix_matches(model, query, max_dist):
+    """
+    Returns {word: distance} for every vocabulary word that has SOME prefix
+    within 'max_dist' edits of 'query' (distance = the best such prefix).
+    """
+    results = {}
+    root = model.find_node("")
+    # (node, path, DP row, best row[-1] seen on the way down)
+    stack = [(root, "", list(range(len(query) + 1)), len(query))]
+    while stack:
+        node, path, row, best = stack.pop()
+        best = min(best, row[-1])
+        if best <= max_dist and model.is_word(node):
+            results[path] = best
+
+        for char, child in model.trie_children(node):
+            child_path = path + char
+            child_row = _next_row(row, query, char)
+            if min(child_row) <= max_dist:
+                stack.append((child, child_path, child_row, best))
+            elif best <= max_dist:
+                # The query already matched above: the rest of the branch can't do
+                # better than 'best', so take its words without any more DP work
+                for word in model.words_below(child, child_path):
+                    results[word] = best
+    return results
@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from cli_app import load_sample_corpus
+from tokenizer import Tokenizer
+
+# ==========================================
+# LOAD GENERATOR for suggest_server.py
+# ==========================================
+# Opens N concurrent connections, each firing requests back-to-back, and
+# reports throughput plus latency percentiles (measured client-side).
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def make_queries(n, seed=0):
+    """Random (context, prefix) pairs drawn from the sample corpus."""
+    rng = random.Random(seed)
+    words = Tokenizer().tokens(load_sample_corpus())
+    queries = []
+    for _ in range(n):
+        i = rng.randrange(1, len(words))
+        queries.append((words[i - 1], words[i][:rng.randint(1, 3)]))
+    return queries
+
+async def run_client(open_connection, queries, k, latencies):
+    reader, writer = await open_connection()
+    try:
+        for i, (context_word, partial_word) in enumerate(queries):
+            request = {"id": i, "context": context_word, "prefix": partial_word, "k": k}
+            start = time.perf_counter()
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if "error" in response:
+                raise RuntimeError(response["error"])
+    finally:
+        writer.close()
+
+async def fetch_stats(open_connection):
+    reader, writer = await open_connection()
+    writer.write(b'{"cmd": "stats"}\n')
+    await writer.drain()
+    stats = json.loads(await reader.readline())["stats"]
+    writer.close()
+    return stats
+
+async def main(args):
+    if args.unix:
+        open_connection = lambda: asyncio.open_unix_connection(args.unix)
+    else:
+        open_connection = lambda: asyncio.open_connection(args.host, args.port)
+
+    latencies = []
+    clients = [
+        run_client(open_connection, make_queries(args.requests, seed=i), args.k, latencies)
+        for i in range(args.clients)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"Clients: {args.clients} | Requests: {total:,} | Wall time: {elapsed:.2f}s")
+    print(f"Throughput: {total / elapsed:,.0f} req/s")
+    for pct in (50, 90, 99, 99.9):
+        print(f"  p{pct:<5} latency: {percentile(latencies, pct) * 1e3:8.3f} ms")
+    print(f"  max    latency: {latencies[-1] * 1e3:8.3f} ms")
+
+    stats = await fetch_stats(open_connection)
+    print(f"Server batching: {stats['batches']:,} batches, avg {stats['avg_batch']:.1f} "
+          f"requests/batch (largest {stats['largest_batch']})")
+
+# ==========================================
+# EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test suggest_server.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket path instead of TCP")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent connections")
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--k", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+from bigram_model import PAIR_SHIFT
+
+# ==========================================
+# THEORY: Online Updates on top of an Immutable Model
+# ==========================================
+# Rebuilding the CSR matrix for every accepted suggestion would cost O(model).
+# Instead, observations land in a small OVERLAY of counts:
+#     effective Count(w1, w2) = base_count * base_scale + overlay_count
+# Probabilities are still ratios computed on demand, so one update is just
+# two dict increments (plus one trie insertion for a brand-new word).
+# The overlay is folded into the CSR matrix by the next (re)training run.
+#
+# EXPONENTIAL DECAY without touching old counts:
+# "multiply every count by 'decay' after each observation" is O(model).
+# Scaling the NEWEST observation up by 1/decay instead gives the same ratios
+# (P = count / total, the common factor cancels), so each observation simply
+# weighs 1/decay more than the previous one. When that weight grows too big
+# for floats, everything is divided down once (O(overlay), rarely).
+#
+# CONCURRENCY: readers never lock. Counts only ever grow, and every denominator
+# is incremented BEFORE its numerator (total tokens, then Count(w1), then
+# Count(w1, w2)): a reader that reads the numerator first can never compute P > 1. Rescaling builds a new
+# overlay object instead of changing this one.
+
+RESCALE_LIMIT = 1e12
+
+
+class OnlineCounts:
+    """Counts (and new words) observed since the model was last built."""
+    def __init__(self, first_id, decay=None):
+        self.decay = decay
+        # Weight of ONE trained count, and of the NEXT observation
+        self.base_scale = 1 if decay is None else 1.0
+        self.weight = 1 if decay is None else 1.0
+
+        # Words first seen online get ids right after the base vocabulary
+        self.first_id = first_id
+        self.words = []
+        self.ids = {}
+
+        self.total = 0       # Sum of the unigram weights (the P(w) denominator)
+        self.unigrams = {}   # {w1_id: weight}
+        self.rows = {}       # {w1_id: {w2_id: weight}}
+        self.observations = 0
+
+    def intern(self, word, base_vocab):
+        """Id of 'word' in the base vocabulary or the overlay (new words are appended)."""
+        word_id = base_vocab.id(word)
+        if word_id < 0:
+            word_id = self.ids.get(word, -1)
+        if word_id < 0:
+            word_id = self.first_id + len(self.words)
+            self.words.append(word)      # List before dict: an id is never visible
+            self.ids[word] = word_id     # before its word is
+        return word_id
+
+    def add(self, w1_id, w2_id):
+        """Counts one (w1, w2) observation. O(1)."""
+        weight = self.weight
+        self.total += weight                                          # Denominators first
+        self.unigrams[w1_id] = self.unigrams.get(w1_id, 0) + weight
+        row = self.rows.get(w1_id)
+        if row is None:
+            row = self.rows[w1_id] = {}
+        row[w2_id] = row.get(w2_id, 0) + weight
+        self.observations += 1
+        if self.decay is not None:
+            self.weight = weight / self.decay
+
+    def needs_rescale(self):
+        return self.decay is not None and self.weight > RESCALE_LIMIT
+
+    def rescaled(self):
+        """A NEW overlay with every weight divided by the current one (same ratios)."""
+        factor = 1 / self.weight
+        online = OnlineCounts(self.first_id, self.decay)
+        online.base_scale = self.base_scale * factor
+        online.words, online.ids = self.words, self.ids  # Append-only: safe to share
+        online.total = self.total * factor
+        online.unigrams = {w1_id: weight * factor for w1_id, weight in self.unigrams.items()}
+        online.rows = {w1_id: {w2_id: weight * factor for w2_id, weight in row.items()}
+                       for w1_id, row in self.rows.items()}
+        online.observations = self.observations
+        return online
+
+    def folded(self):
+        """
+        (pending_unigrams, pending_pairs, scale) for a training run: the overlay
+        as staged counts, in units where a fresh count weighs 1, and the factor
+        the existing (trained) counts must be multiplied by.
+        """
+        factor = 1 / self.weight
+        unigrams = {w1_id: weight * factor for w1_id, weight in self.unigrams.items()}
+        pairs = {}
+        for w1_id, row in self.rows.items():
+            for w2_id, weight in row.items():
+                pairs[(w1_id << PAIR_SHIFT) | w2_id] = weight * factor
+        return unigrams, pairs, self.base_scale * factor
@@ -0,0 +1,60 @@
+import argparse
+import os
+import random
+import time
+
+from autocomplete_engine import AutocompleteEngine
+
+# ==========================================
+# BENCHMARK: Single-process vs. Map-Reduce training
+# ==========================================
+
+def generate_corpus(n_tokens, vocab_size=50_000, seed=42):
+    """Synthetic corpus with a Zipfian word distribution (like real text)."""
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(vocab_size)]
+    weights = [1 / (rank + 1) for rank in range(vocab_size)]
+    words = rng.choices(vocab, weights=weights, k=n_tokens)
+    # Sprinkle sentence ends so the tokenizer has some punctuation to strip
+    return " ".join(word + "." if i % 17 == 16 else word for i, word in enumerate(words))
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+# ==========================================
+# EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the speedup of train_parallel().")
+    parser.add_argument("--tokens", type=int, default=2_000_000, help="corpus size in tokens")
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"Generating a {args.tokens:,}-token corpus...")
+    corpus = generate_corpus(args.tokens)
+
+    baseline = AutocompleteEngine()
+    single_time = timed(lambda: baseline.train(corpus))
+
+    process_counts = [1]
+    while process_counts[-1] * 2 <= args.max_processes:
+        process_counts.append(process_counts[-1] * 2)
+    if process_counts[-1] != args.max_processes:
+        process_counts.append(args.max_processes)
+
+    print(f"\n{'Processes':>9} | {'Time':>9} | {'Speedup':>7}")
+    print("-" * 33)
+    print(f"{'train()':>9} | {single_time:>8.2f}s | {1.0:>6.2f}x")
+    for processes in process_counts:
+        engine = AutocompleteEngine()
+        elapsed = timed(lambda: engine.train_parallel(corpus, processes=processes))
+        print(f"{processes:>9} | {elapsed:>8.2f}s | {single_time / elapsed:>6.2f}x")
+
+        # Validation: Map-Reduce must reproduce the exact same model (same ids, same CSR arrays)
+        assert engine.vocab.words == baseline.vocab.words
+        for name in ("unigram_counts", "row_offsets", "successors", "counts"):
+            assert getattr(engine.bigrams, name) == getattr(baseline.bigrams, name)
+
+    print("\nSuccess: Every parallel run matched single-process training exactly.")
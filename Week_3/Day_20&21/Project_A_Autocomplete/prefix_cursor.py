@@ -0,0 +1,128 @@
+# ==========================================
+# THEORY: Incremental Prefix Search (a Stack of Trie States)
+# ==========================================
+# suggest(context, prefix) starts at the root every time: typing "learn"
+# costs 1 + 2 + 3 + 4 + 5 trie steps plus 5 full subtree scans.
+# A cursor remembers where it is instead:
+#   * push(char) -> ONE trie step from the current node          O(1)
+#   * pop()      -> backspace = pop the stack, the old state is intact
+#   * candidates -> filtered from the PARENT's candidate list (which only
+#                   shrinks as the prefix grows) instead of re-scanning
+#                   the subtree.
+# This is the "choose -> explore -> un-choose" stack from backtracking,
+# driven by the user's keystrokes.
+
+class PrefixCursor:
+    """Keystroke-incremental autocomplete session over an AutocompleteEngine."""
+    def __init__(self, engine, context_word=""):
+        self.engine = engine
+        self.context_word = context_word
+        self._chars = []
+        self._reset()
+
+    def _reset(self):
+        # The model version this session walks (a retrain publishes a new one)
+        self._model = self.engine.model
+        # Each state is [trie node (None = dead prefix), cached candidates (None = not computed)]
+        self._stack = [[self._model.find_node(""), None]]
+
+    def _sync(self):
+        """Replays the typed characters if the engine was retrained meanwhile."""
+        if self._model is not self.engine.model:
+            chars, self._chars = self._chars, []
+            self._reset()
+            for char in chars:
+                self.push(char)
+
+    @property
+    def prefix(self):
+        return "".join(self._chars)
+
+    # ==========================================
+    # KEYSTROKES
+    # ==========================================
+    def push(self, char):
+        """Appends one character: a single trie step from the current node."""
+        self._sync()
+        node = self._stack[-1][0]
+        child = None if node is None else self._model.trie_child(node, char)
+        self._stack.append([child, None])
+        self._chars.append(char)
+
+    def pop(self):
+        """Backspace: returns to the previous state (its candidates are still cached)."""
+        if self._chars:
+            self._stack.pop()
+            self._chars.pop()
+
+    def commit(self):
+        """Word boundary: the typed word becomes the context for the next one."""
+        if self._chars:
+            self.context_word = self.prefix
+            self._chars = []
+            self._reset()
+
+    def type(self, text):
+        """Feeds raw keystrokes: backspace pops, whitespace commits, anything else pushes."""
+        for char in text:
+            if char in ("\b", "\x7f"):
+                self.pop()
+            elif char.isspace():
+                self.commit()
+            else:
+                self.push(char.lower())
+
+    # ==========================================
+    # QUERIES
+    # ==========================================
+    def candidates(self):
+        """Every vocabulary word starting with the current prefix (computed lazily)."""
+        self._sync()
+        depth = len(self._stack) - 1
+        state = self._stack[depth]
+        if state[1] is None:
+            state[1] = self._compute_candidates(depth)
+        return state[1]
+
+    def _compute_candidates(self, depth):
+        node = self._stack[depth][0]
+        if node is None:
+            return []
+
+        parent = self._stack[depth - 1][1] if depth > 0 else None
+        if parent is not None:
+            # Keep only the parent's words whose next character is the one just typed
+            position, char = depth - 1, self._chars[depth - 1]
+            return [word for word in parent if len(word) > position and word[position] == char]
+
+        return self._model.words_below(node, "".join(self._chars[:depth]))
+
+    def suggestions(self, k=None):
+        """Ranked suggestions for the current (context, prefix) state."""
+        self._sync()
+        node = self._stack[-1][0]
+        if node is None:
+            return []
+        if self._model.uses_top_k_path(k):
+            # O(k): the node's precomputed Top-K list, no candidate scan at all
+            return self._model.suggest_top_k(self.context_word, self.prefix, k, node=node)
+        return self._model.rank_suggestions(self.context_word, self.prefix, k, self.candidates())
+
+
+# ==========================================
+# EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    from cli_app import load_sample_corpus
+    from autocomplete_engine import AutocompleteEngine
+
+    engine = AutocompleteEngine()
+    engine.train(load_sample_corpus())
+
+    cursor = engine.cursor()
+    print("\n--- Simulated keystrokes ---")
+    for keys in ["machine ", "l", "e", "a", "\b", "\b"]:
+        cursor.type(keys)
+        shown = repr(keys) if keys in (" ", "\b") or keys.endswith(" ") else keys
+        print(f"key {shown:<12} context='{cursor.context_word}' prefix='{cursor.prefix}' "
+              f"-> {cursor.suggestions(k=3)}")
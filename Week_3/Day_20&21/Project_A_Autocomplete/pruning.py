@@ -0,0 +1,229 @@
+import array
+import heapq
+
+from bigram_model import BigramMatrix, Vocabulary
+
+# ==========================================
+# THEORY: Pruning by Value per Byte
+# ==========================================
+# Word frequencies follow Zipf's law: most of the vocabulary (typos, IDs,
+# one-off names) is seen once or twice, yet every word costs trie nodes,
+# a vocabulary string and a CSR row, and every bigram costs 12 bytes.
+# Pruning keeps the entries that answer the most queries:
+#   1. min_count       -> drop words seen fewer than N times
+#   2. max_vocab       -> keep only the N most frequent words
+#   3. max_successors  -> keep only the N best successors per context
+#                         (rows are sorted by count: just truncate them)
+#   4. max_bytes       -> evict the entries with the LOWEST VALUE PER BYTE
+#                         (count / 12 for a bigram, frequency / bytes for a word)
+#                         until the estimated model size fits the budget.
+# Unigram counts (the denominators) are kept as they were, so every surviving
+# P(w2 | w1) is unchanged: pruning only forgets, it never distorts.
+# Dead trie branches disappear because the trie is rebuilt from the kept words.
+
+BIGRAM_ENTRY_BYTES = 4 + 8  # successors ('I') + counts ('Q')
+
+
+class PruningPolicy:
+    """What the engine is allowed to keep. Every limit is optional."""
+    def __init__(self, min_count=None, max_vocab=None, max_successors=None, max_bytes=None):
+        for name, value in (("min_count", min_count), ("max_vocab", max_vocab),
+                            ("max_successors", max_successors), ("max_bytes", max_bytes)):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be >= 1, got {value!r}")
+        self.min_count = min_count
+        self.max_vocab = max_vocab
+        self.max_successors = max_successors
+        self.max_bytes = max_bytes
+
+
+class PruneReport:
+    """Memory reclaimed vs. suggestion quality lost by one pruning pass."""
+    def __init__(self, words_before, words_after, bigrams_before, bigrams_after,
+                 bytes_before, bytes_after, token_coverage, bigram_mass, top3_recall):
+        self.words_before = words_before
+        self.words_after = words_after
+        self.bigrams_before = bigrams_before
+        self.bigrams_after = bigrams_after
+        self.bytes_before = bytes_before
+        self.bytes_after = bytes_after
+        # Quality kept (1.0 = nothing lost):
+        self.token_coverage = token_coverage  # Share of token occurrences whose word survived
+        self.bigram_mass = bigram_mass        # Share of bigram occurrences that survived
+        self.top3_recall = top3_recall        # Share of each context's top-3 successors kept (count-weighted)
+
+    @property
+    def reclaimed_bytes(self):
+        return self.bytes_before - self.bytes_after
+
+    def __str__(self):
+        saved = self.reclaimed_bytes / self.bytes_before if self.bytes_before else 0.0
+        return (f"Pruning: words {self.words_before:,} -> {self.words_after:,} | "
+                f"bigrams {self.bigrams_before:,} -> {self.bigrams_after:,} | "
+                f"memory {self.bytes_before / 1e6:.2f} MB -> {self.bytes_after / 1e6:.2f} MB "
+                f"({saved:.1%} reclaimed)\n"
+                f"Quality kept: token coverage {self.token_coverage:.2%} | "
+                f"bigram mass {self.bigram_mass:.2%} | top-3 successor recall {self.top3_recall:.2%}")
+
+
+def word_frequencies(bigrams, num_words):
+    """
+    Occurrences of every word. unigram_counts only counts a word as a CONTEXT
+    (the last token of the corpus never is), so take the larger of its
+    outgoing and incoming bigram totals.
+    """
+    incoming = [0] * num_words
+    for w2_id, count in zip(bigrams.successors, bigrams.counts):
+        incoming[w2_id] += count
+    return [max(bigrams.unigram(word_id), incoming[word_id]) for word_id in range(num_words)]
+
+
+def prune_counts(vocab, bigrams, policy, bytes_per_word):
+    """
+    Applies 'policy' to a vocabulary + bigram matrix (neither is modified).
+    bytes_per_word: estimated cost of one word outside the bigram entries
+                    (trie nodes, vocabulary string, unigram count, row offset).
+    Returns (new_vocab, new_bigrams, quality) with words re-interned densely
+    (same relative order) and quality = (token_coverage, bigram_mass, top3_recall).
+    """
+    num_words = len(vocab)
+    num_entries = len(bigrams.successors)
+    freq = word_frequencies(bigrams, num_words)
+
+    # 1 + 2. Vocabulary limits
+    keep_word = bytearray(b"\x01") * num_words
+    if policy.min_count is not None:
+        for word_id, count in enumerate(freq):
+            if count < policy.min_count:
+                keep_word[word_id] = 0
+    if policy.max_vocab is not None:
+        kept = [word_id for word_id in range(num_words) if keep_word[word_id]]
+        if len(kept) > policy.max_vocab:
+            keep_word = bytearray(num_words)
+            for word_id in heapq.nsmallest(policy.max_vocab, kept, key=lambda i: (-freq[i], vocab.word(i))):
+                keep_word[word_id] = 1
+
+    # 3. Entries whose words both survived, at most max_successors per row
+    keep_entry = bytearray(num_entries)
+    for w1_id in range(num_words):
+        if not keep_word[w1_id]:
+            continue
+        start, end = bigrams.row(w1_id)
+        kept_in_row = 0
+        for i in range(start, end):
+            if policy.max_successors is not None and kept_in_row == policy.max_successors:
+                break
+            if keep_word[bigrams.successors[i]]:
+                keep_entry[i] = 1
+                kept_in_row += 1
+
+    # 4. Byte budget: evict the lowest value per byte first
+    if policy.max_bytes is not None:
+        _fit_budget(bigrams, freq, keep_word, keep_entry, policy.max_bytes, bytes_per_word)
+
+    # Re-intern the survivors and rebuild the CSR arrays (rows keep their order)
+    new_ids = array.array('i', [-1]) * num_words
+    new_vocab = Vocabulary()
+    for word_id in range(num_words):
+        if keep_word[word_id]:
+            new_ids[word_id] = new_vocab.add(vocab.word(word_id))
+
+    unigram_counts = array.array('Q', (bigrams.unigram(word_id) for word_id in range(num_words)
+                                       if keep_word[word_id]))
+    row_offsets = array.array('Q', [0])
+    successors = array.array('I')
+    counts = array.array('Q')
+    for w1_id in range(num_words):
+        if not keep_word[w1_id]:
+            continue
+        start, end = bigrams.row(w1_id)
+        for i in range(start, end):
+            if keep_entry[i]:
+                successors.append(new_ids[bigrams.successors[i]])
+                counts.append(bigrams.counts[i])
+        row_offsets.append(len(successors))
+    new_bigrams = BigramMatrix(unigram_counts, row_offsets, successors, counts)
+
+    return new_vocab, new_bigrams, _quality(bigrams, freq, keep_word, keep_entry)
+
+
+def _fit_budget(bigrams, freq, keep_word, keep_entry, max_bytes, bytes_per_word):
+    """Greedy eviction (in place) until the estimated size fits 'max_bytes'."""
+    num_words = len(keep_word)
+    estimate = bytes_per_word * sum(keep_word) + BIGRAM_ENTRY_BYTES * sum(keep_entry)
+    if estimate <= max_bytes:
+        return
+
+    # Evicting a word also evicts every bigram it appears in
+    incoming = [[] for _ in range(num_words)]
+    for i, w2_id in enumerate(bigrams.successors):
+        if keep_entry[i]:
+            incoming[w2_id].append(i)
+
+    candidates = [(bigrams.counts[i] / BIGRAM_ENTRY_BYTES, 0, i)
+                  for i in range(len(keep_entry)) if keep_entry[i]]
+    candidates += [(freq[word_id] / bytes_per_word, 1, word_id)
+                   for word_id in range(num_words) if keep_word[word_id]]
+    candidates.sort()
+
+    for _, is_word, index in candidates:
+        if estimate <= max_bytes:
+            break
+        if not is_word:
+            if keep_entry[index]:
+                keep_entry[index] = 0
+                estimate -= BIGRAM_ENTRY_BYTES
+            continue
+        keep_word[index] = 0
+        estimate -= bytes_per_word
+        start, end = bigrams.row(index)
+        for i in list(range(start, end)) + incoming[index]:
+            if keep_entry[i]:
+                keep_entry[i] = 0
+                estimate -= BIGRAM_ENTRY_BYTES
+
+
+def _quality(bigrams, freq, keep_word, keep_entry):
+    total_tokens = sum(freq)
+    kept_tokens = sum(count for count, kept in zip(freq, keep_word) if kept)
+
+    total_mass = kept_mass = 0
+    top3_total = top3_kept = 0
+    for w1_id in range(len(keep_word)):
+        start, end = bigrams.row(w1_id)
+        for i in range(start, end):
+            total_mass += bigrams.counts[i]
+            if keep_entry[i]:
+                kept_mass += bigrams.counts[i]
+        # What suggest() would show for this context (rows are sorted best first)
+        top = range(start, min(end, start + 3))
+        weight = bigrams.unigram(w1_id)
+        top3_total += weight * len(top)
+        top3_kept += weight * sum(keep_entry[i] for i in top)
+
+    return (kept_tokens / total_tokens if total_tokens else 1.0,
+            kept_mass / total_mass if total_mass else 1.0,
+            top3_kept / top3_total if top3_total else 1.0)
+
+
+if __name__ == "__main__":
+    import random
+
+    from autocomplete_engine import AutocompleteEngine
+
+    # Zipf-like corpus: a few common words, a long tail of rare ones
+    random.seed(0)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    corpus = " ".join(random.choices(vocabulary, weights=weights, k=100_000))
+
+    full = AutocompleteEngine(top_k=10)
+    full.train(corpus)
+    budget = full.model.nbytes() // 4
+
+    print(f"\n--- min_count=2, max_successors=20, max_bytes={budget:,} ---")
+    pruned = AutocompleteEngine(top_k=10, pruning=PruningPolicy(min_count=2, max_successors=20, max_bytes=budget))
+    pruned.train(corpus)
+
+    print(f"\nfull:   {full.suggest('word1', 'word', k=5)}")
+    print(f"pruned: {pruned.suggest('word1', 'word', k=5)}")
@@ -0,0 +1,420 @@
+import argparse
+import array
+import bisect
+import collections
+import multiprocessing
+import random
+import threading
+import time
+
+from autocomplete_engine import AutocompleteEngine
+from bigram_model import BigramMatrix, Vocabulary
+from compact_trie import CompactTrie
+from frozen_model import BACKOFF_WEIGHT, FrozenModel, insert_words
+
+# ==========================================
+# THEORY: Sharding by the Word Being Completed
+# ==========================================
+# One engine = one process = one GIL. To use every core, the model is split
+# across N worker processes by the FIRST CHARACTER of the candidate word:
+#   * shard i owns the words whose first char falls in its range (contiguous,
+#     alphabetical ranges balanced by how many bigram entries they hold)
+#   * its vocabulary, unigram counts, trie and Top-K lists contain only those
+#     words (numbered 0..m-1 locally)
+#   * its CSR matrix keeps the bigram COLUMNS of those words: every
+#     Count(c, w) where w is owned, with one row per context c that has at
+#     least one owned successor (context_ids maps rows to global ids)
+# A score also needs Count(c) and N, which belong to words of OTHER shards.
+# The coordinator keeps the one full copy of the vocabulary and unigram
+# counts, resolves the context of every query to ShardContext(id, Count(c))
+# and sends that instead of the word; N is sent with the shard's part.
+# A query with prefix "le" can only complete to words starting with "l":
+# ONE shard answers it, with exactly the scores a single engine would give.
+# Only an empty prefix fans out to every shard; the coordinator merges the
+# already-ranked top-k lists. Different prefixes are served in parallel.
+# Memory per shard is ~1/N of the model (plus 4 + 8 bytes per context row).
+#
+# Protocol: one Pipe per worker, (command, payload) -> (ok, result).
+
+SHARD_COMMANDS = ("suggest_batch", "bigram_prob_batch", "successors")
+
+# A query's context, resolved by the coordinator: global word id (-1 if unknown) + Count(c)
+ShardContext = collections.namedtuple("ShardContext", ["word_id", "count"])
+
+
+def assign_char_ranges(char_weights, n_shards):
+    """
+    {first_char: weight} -> {first_char: shard}. Sorted chars are cut into
+    contiguous ranges of roughly equal total weight.
+    """
+    chars = sorted(char_weights)
+    total = sum(char_weights.values())
+    shard_of_char = {}
+    shard, accumulated = 0, 0
+    for i, char in enumerate(chars):
+        shard_of_char[char] = shard
+        accumulated += char_weights[char]
+        chars_left = len(chars) - i - 1
+        # Move on once this shard has its share (but never leave a shard empty)
+        if shard < n_shards - 1 and chars_left and (accumulated >= total * (shard + 1) / n_shards
+                                                    or chars_left <= n_shards - 1 - shard):
+            shard += 1
+    return shard_of_char
+
+
+def split_columns(bigrams, shard_of_id, local_ids, n_shards):
+    """
+    Splits a CSR matrix into n_shards matrices, each keeping the columns (w2 ids)
+    it owns, renumbered to local ids. A shard only gets rows for the contexts
+    that have an owned successor: (context_ids, row_offsets, successors, counts).
+    """
+    parts = [(array.array('I'), array.array('Q', [0]), array.array('I'), array.array('Q'))
+             for _ in range(n_shards)]
+    num_rows = len(bigrams.row_offsets) - 1
+    for w1_id in range(num_rows):
+        start, end = bigrams.row(w1_id)
+        touched = set()
+        for i in range(start, end):
+            w2_id = bigrams.successors[i]
+            shard = shard_of_id[w2_id]
+            _, _, successors, counts = parts[shard]
+            successors.append(local_ids[w2_id])  # Row order (count desc) is kept
+            counts.append(bigrams.counts[i])
+            touched.add(shard)
+        for shard in touched:
+            context_ids, row_offsets, successors, _ = parts[shard]
+            context_ids.append(w1_id)
+            row_offsets.append(len(successors))
+    return parts
+
+
+class ShardModel(FrozenModel):
+    """
+    A FrozenModel over one shard's words. Contexts arrive as ShardContext:
+    their row is found by Binary Search in context_ids and their count is given,
+    so the shard needs no vocabulary or unigram counts beyond its own words.
+    """
+    def __init__(self, vocab, bigrams, context_ids, total, trie_backend, **options):
+        super().__init__(vocab, bigrams, trie_backend, **options)
+        self.context_ids = context_ids  # Global id of each CSR row (sorted)
+        self._base_total = total        # N of the whole model
+
+    def word_id(self, word):
+        """Row of a ShardContext (-1 if it has no owned successor), else the local id of a word."""
+        if isinstance(word, ShardContext):
+            row = bisect.bisect_left(self.context_ids, word.word_id)
+            found = row < len(self.context_ids) and self.context_ids[row] == word.word_id
+            return row if found else -1
+        return self.vocab.id(word)
+
+    def unigram_count(self, word):
+        if isinstance(word, ShardContext):
+            return word.count
+        return self.bigrams.unigram(self.vocab.id(word))
+
+    def bigram_prob(self, context, w2):
+        row, w2_id = self.word_id(context), self.vocab.id(w2)
+        if row < 0 or w2_id < 0:
+            return 0.0
+        return self.bigrams.count(row, w2_id) / context.count
+
+    def successors(self, context):
+        """(next_word, P(next_word | context)) of the owned successors, most probable first."""
+        for w2_id, count in self.bigrams.successors_of(self.word_id(context)):
+            yield self.vocab.word(w2_id), count / context.count
+
+
+def _build_shard_engine(options, words, unigram_counts, total, context_ids, row_offsets, successors, counts):
+    """Runs in the worker: wraps one shard's arrays in a regular engine."""
+    engine = AutocompleteEngine(**options)
+    root = compact_trie = None
+    if engine.trie_backend == "compact":
+        compact_trie = CompactTrie(words)
+    else:
+        root = insert_words(None, sorted(words))
+    model = ShardModel(Vocabulary(words), BigramMatrix(unigram_counts, row_offsets, successors, counts),
+                       context_ids, total, engine.trie_backend, root=root, compact_trie=compact_trie,
+                       top_k=engine.top_k, version=1, backoff=engine.backoff)
+    if engine.top_k is not None:
+        model.build_top_completions()
+    engine.model = model
+    return engine
+
+
+def _serve_shard(conn):
+    """Worker loop: answers (command, payload) requests until 'stop'."""
+    engine = None
+    while True:
+        command, payload = conn.recv()
+        if command == "stop":
+            conn.send((True, None))
+            return
+        try:
+            if command == "load":
+                engine = _build_shard_engine(*payload)
+                result = (len(payload[1]), engine.model.nbytes())
+            elif command == "suggest_batch":
+                result = engine.suggest_batch(payload)
+            elif command == "bigram_prob_batch":
+                result = [engine.model.bigram_prob(context, w2) for context, w2 in payload]
+            elif command == "successors":
+                result = list(engine.model.successors(payload))
+            else:
+                raise ValueError(f"unknown shard command {command!r}")
+            conn.send((True, result))
+        except Exception as exc:
+            conn.send((False, exc))
+
+
+class ShardedEngine:
+    """
+    Coordinator of N shard worker processes (see THEORY above). Same query API
+    as AutocompleteEngine: suggest, suggest_batch, bigram_prob, successors.
+    Training happens in the coordinator (any AutocompleteEngine method), then
+    distribute() ships every shard its part and frees the bigram matrix; the
+    coordinator keeps only the vocabulary and unigram counts (see THEORY).
+    """
+    def __init__(self, n_shards=None, trie_backend="node", top_k=None, cache_size=None,
+                 backoff=BACKOFF_WEIGHT):
+        self.n_shards = n_shards or multiprocessing.cpu_count() or 1
+        self.options = {"trie_backend": trie_backend, "top_k": top_k, "cache_size": cache_size,
+                        "backoff": backoff}
+        self.shard_of_char = {}
+        self.shard_sizes = [0] * self.n_shards   # Words owned by each shard
+        self.shard_nbytes = [0] * self.n_shards  # Approximate model bytes held by each shard
+        self.vocab = None                        # Coordinator side: resolves contexts (see THEORY)
+        self.unigram_counts = None
+
+        # Started before any model exists, so forking copies (almost) nothing
+        self._conns = []
+        self._locks = []
+        self._workers = []
+        for _ in range(self.n_shards):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_serve_shard, args=(child_conn,), daemon=True)
+            worker.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._locks.append(threading.Lock())
+            self._workers.append(worker)
+
+    # ==========================================
+    # TRAINING / LOADING
+    # ==========================================
+    def train(self, corpus, **engine_options):
+        engine = AutocompleteEngine(**engine_options)
+        engine.train(corpus)
+        self.distribute(engine.model)
+
+    def train_from_files(self, paths, **engine_options):
+        engine = AutocompleteEngine(**engine_options)
+        engine.train_from_files(paths)
+        self.distribute(engine.model)
+
+    def load(self, path):
+        """Shards a snapshot written by AutocompleteEngine.save()."""
+        self.distribute(AutocompleteEngine.load(path).model)
+
+    def distribute(self, model):
+        """Splits a trained (FrozenModel) model across the shards and waits until all are ready."""
+        if model.online is not None:
+            raise ValueError("fold the online observations first (engine.compact_observations())")
+        vocab, bigrams = model.vocab, model.bigrams
+        words = [vocab.word(word_id) for word_id in range(len(vocab))]
+
+        # Balance by bigram entries (memory AND work follow them), +1 per word
+        incoming = [1] * len(words)
+        for w2_id in bigrams.successors:
+            incoming[w2_id] += 1
+        char_weights = {}
+        for word, weight in zip(words, incoming):
+            char_weights[word[0]] = char_weights.get(word[0], 0) + weight
+        shard_of_char = assign_char_ranges(char_weights, self.n_shards)
+        shard_of_id = [shard_of_char[word[0]] for word in words]
+
+        owned_words = [[] for _ in range(self.n_shards)]
+        local_ids = array.array('I')
+        for word, shard in zip(words, shard_of_id):
+            local_ids.append(len(owned_words[shard]))
+            owned_words[shard].append(word)
+        unigram_counts = array.array('Q', bigrams.unigram_counts)
+        owned_counts = [array.array('Q') for _ in range(self.n_shards)]
+        for count, shard in zip(unigram_counts, shard_of_id):
+            owned_counts[shard].append(count)
+        parts = split_columns(bigrams, shard_of_id, local_ids, self.n_shards)
+        total = sum(unigram_counts)
+
+        # All shards build their tries in parallel
+        payloads = [("load", (self.options, owned_words[shard], owned_counts[shard], total, *parts[shard]))
+                    for shard in range(self.n_shards)]
+        replies = self._fan_out(range(self.n_shards), payloads)
+        self.shard_sizes = [size for size, _ in replies]
+        self.shard_nbytes = [nbytes for _, nbytes in replies]
+        self.shard_of_char = shard_of_char
+        self.vocab, self.unigram_counts = vocab, unigram_counts
+
+    def _context(self, word):
+        """ShardContext of a context word: what the shards need to know about it."""
+        word_id = self.vocab.id(word) if self.vocab is not None else -1
+        return ShardContext(word_id, self.unigram_counts[word_id] if word_id >= 0 else 0)
+
+    # ==========================================
+    # ROUTING
+    # ==========================================
+    def shard_for(self, prefix):
+        """The shard owning every completion of 'prefix' (None: no word starts like that)."""
+        return self.shard_of_char.get(prefix[0]) if prefix else None
+
+    def _call(self, shard, command, payload):
+        return self._fan_out([shard], [(command, payload)])[0]
+
+    def _fan_out(self, shards, requests):
+        """Sends one request per shard, THEN collects the replies: the shards work in parallel."""
+        shards = list(shards)
+        order = sorted(range(len(shards)), key=lambda i: shards[i])
+        # Locks are always taken in shard order, so concurrent callers can't deadlock
+        for i in order:
+            self._locks[shards[i]].acquire()
+        try:
+            for i in order:
+                self._conns[shards[i]].send(requests[i])
+            replies = [self._conns[shard].recv() for shard in shards]
+        finally:
+            for i in order:
+                self._locks[shards[i]].release()
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    # ==========================================
+    # QUERIES
+    # ==========================================
+    def suggest(self, context_word, partial_word, k=None):
+        return self.suggest_batch([(context_word, partial_word, k)])[0]
+
+    def suggest_batch(self, queries):
+        """
+        Answers (context_word, partial_word, k) queries. Each query goes to the
+        one shard owning its prefix (an empty prefix goes to all of them); every
+        involved shard gets ONE sub-batch, and they all run at the same time.
+        """
+        batches = {}  # shard -> [query index, ...]
+        for i, (_, partial_word, _) in enumerate(queries):
+            if partial_word:
+                shard = self.shard_for(partial_word)
+                if shard is not None:
+                    batches.setdefault(shard, []).append(i)
+            else:
+                for shard in range(self.n_shards):
+                    batches.setdefault(shard, []).append(i)
+
+        resolved = [(self._context(context_word), partial_word, k) for context_word, partial_word, k in queries]
+        shards = list(batches)
+        replies = self._fan_out(shards, [("suggest_batch", [resolved[i] for i in batches[shard]])
+                                         for shard in shards])
+
+        results = [[] for _ in queries]
+        for shard, shard_results in zip(shards, replies):
+            for i, suggestions in zip(batches[shard], shard_results):
+                results[i].extend(suggestions)
+        for i, (_, partial_word, k) in enumerate(queries):
+            if not partial_word and self.n_shards > 1:
+                # Merge the shards' ranked lists (same scores, same tie-break as one engine)
+                results[i].sort(key=lambda x: (-x[1], x[0]))
+                if k is not None:
+                    del results[i][k:]
+        return results
+
+    def bigram_prob(self, w1, w2):
+        """P(w2 | w1), asked to the shard that owns w2's column."""
+        shard = self.shard_for(w2)
+        if shard is None:
+            return 0.0
+        return self._call(shard, "bigram_prob_batch", [(self._context(w1), w2)])[0]
+
+    def successors(self, word):
+        """[(next_word, P(next_word | word)), ...] most probable first (gathered from every shard)."""
+        context = self._context(word)
+        if not context.count:
+            return []
+        replies = self._fan_out(range(self.n_shards), [("successors", context)] * self.n_shards)
+        return sorted((pair for reply in replies for pair in reply), key=lambda x: (-x[1], x[0]))
+
+    def unigram_count(self, word):
+        return self._context(word).count  # Answered by the coordinator's own table
+
+    def close(self):
+        for shard in range(self.n_shards):
+            try:
+                self._call(shard, "stop", None)
+            except (EOFError, OSError):
+                pass
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ==========================================
+# EXECUTION: throughput vs. number of shards
+# ==========================================
+def generate_corpus(n_tokens, vocab_size=50_000, seed=42):
+    """Zipfian corpus whose words start with many different letters (so they can be sharded)."""
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocab = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(2, 8))) for _ in range(vocab_size)})
+    rng.shuffle(vocab)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    return rng.choices(vocab, weights=weights, k=n_tokens)
+
+def make_queries(tokens, n, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        i = rng.randrange(1, len(tokens))
+        queries.append((tokens[i - 1], tokens[i][:rng.randint(1, 3)], 3))
+    return queries
+
+def throughput(suggest_batch, queries, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        suggest_batch(queries[i:i + batch_size])
+    return len(queries) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure suggest throughput of a ShardedEngine.")
+    parser.add_argument("--tokens", type=int, default=1_000_000, help="corpus size in tokens")
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=2_000)
+    parser.add_argument("--max-shards", type=int, default=multiprocessing.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"Generating a {args.tokens:,}-token corpus...")
+    tokens = generate_corpus(args.tokens)
+    corpus = " ".join(tokens)
+    queries = make_queries(tokens, args.queries)
+
+    single = AutocompleteEngine()
+    single.train(corpus)
+    expected = single.suggest_batch(queries)
+    single_qps = throughput(single.suggest_batch, queries, args.batch_size)
+
+    print(f"\n{'Shards':>9} | {'Queries/s':>10} | {'Speedup':>7}")
+    print("-" * 34)
+    print(f"{'single':>9} | {single_qps:>10,.0f} | {1.0:>6.2f}x")
+    shard_counts = sorted({1, 2, 4, args.max_shards} & set(range(1, args.max_shards + 1)))
+    for n_shards in shard_counts:
+        with ShardedEngine(n_shards) as sharded:
+            sharded.train(corpus)
+            assert sharded.suggest_batch(queries) == expected  # Same answers as one engine
+            qps = throughput(sharded.suggest_batch, queries, args.batch_size)
+            print(f"{n_shards:>9} | {qps:>10,.0f} | {qps / single_qps:>6.2f}x   "
+                  f"(words per shard: {sharded.shard_sizes}, "
+                  f"MB per shard: {[round(nbytes / 1e6, 1) for nbytes in sharded.shard_nbytes]})")
+
+    print("\nSuccess: Every sharded run matched the single engine exactly.")
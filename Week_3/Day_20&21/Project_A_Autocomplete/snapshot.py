@@ -0,0 +1,241 @@
+import array
+import bisect
+import mmap
+import struct
+import sys
+
+from bigram_model import BigramMatrix
+from compact_trie import CompactTrie, _label_typecode
+
+# ==========================================
+# THEORY: Memory-Mapped Model Snapshots
+# ==========================================
+# Retraining on every start-up is wasted work. Instead we dump the trained
+# model as a handful of flat arrays and map the file straight into memory:
+# the OS pages data in lazily, and several processes that load the same
+# file SHARE the same physical pages (no per-process copy).
+#
+# File layout (all integers little-endian, every section 8-byte aligned):
+#
+#   header   : MAGIC (8s) | version (I) | flags (I) | top_k (I) | n_sections (I)
+#   table    : n_sections x (offset Q, length Q)
+#   sections : see SECTIONS below (one flat array each)
+#
+# Words are interned to ids in SORTED order, so word -> id is a Binary Search
+# and the bigram table is a CSR sparse matrix over those ids.
+
+MAGIC = b"ACSNAP\x00\x00"
+SNAPSHOT_VERSION = 2
+FLAG_TOP_K = 1
+
+_HEADER = struct.Struct("<8sIIII")
+_SECTION = struct.Struct("<QQ")
+
+# (name, typecode) - typecode None means raw bytes / utf-8 text
+SECTIONS = (
+    ("vocab_blob", None),          # all words, utf-8, concatenated in id order
+    ("vocab_offsets", 'Q'),        # word i = vocab_blob[offsets[i]:offsets[i + 1]]
+    ("unigram_counts", 'Q'),       # Count(w) for every id
+    ("bigram_row_offsets", 'Q'),   # CSR row pointer: successors of w1 live in [row[w1], row[w1 + 1])
+    ("bigram_successors", 'I'),    # successor ids, each row sorted by count (desc)
+    ("bigram_counts", 'Q'),        # Count(w1, w2) aligned with bigram_successors
+    ("bigram_word_order", 'I'),    # each row's entries sorted by word (offsets into the row)
+    ("trie_alphabet", None),       # utf-8 interned alphabet of the CompactTrie
+    ("trie_first_child", 'I'),
+    ("trie_labels", 'label'),      # typecode depends on the alphabet size
+    ("trie_is_end", None),
+    ("top_offsets", 'I'),          # per-node Top-K lists (empty unless FLAG_TOP_K)
+    ("top_ids", 'I'),
+)
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _to_bytes(values):
+    """Serializes an array / bytearray as little-endian bytes."""
+    if isinstance(values, array.array) and not _LITTLE_ENDIAN:
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return bytes(values)
+
+
+def _from_buffer(buffer, typecode):
+    """Zero-copy typed view over a mapped section (copies only on big-endian hosts)."""
+    if _LITTLE_ENDIAN:
+        return buffer.cast(typecode)
+    values = array.array(typecode, bytes(buffer))
+    values.byteswap()
+    return values
+
+
+# ==========================================
+# READ-ONLY VIEWS OVER THE MAPPED ARRAYS
+# ==========================================
+class MappedVocabulary:
+    """id <-> word lookups without materializing a Python string per word."""
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def nbytes(self):
+        return len(self._blob) + 8 * len(self._offsets)
+
+    def word(self, word_id):
+        return str(self._blob[self._offsets[word_id]:self._offsets[word_id + 1]], "utf-8")
+
+    def id(self, word):
+        """O(log V) Binary Search over the sorted vocabulary. Returns -1 if unknown."""
+        i = bisect.bisect_left(range(len(self)), word, key=self.word)
+        if i < len(self) and self.word(i) == word:
+            return i
+        return -1
+
+    def __getitem__(self, item):
+        """Supports slices of ids -> list of words (used for the Top-K lists)."""
+        if isinstance(item, slice):
+            return [self.word(i) for i in range(*item.indices(len(self)))]
+        return self.word(item)
+
+
+class _IdWordList:
+    """Looks like a list of words, but is backed by an array of word ids."""
+    def __init__(self, ids, vocab):
+        self._ids = ids
+        self._vocab = vocab
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._vocab.word(i) for i in self._ids[item]]
+        return self._vocab.word(self._ids[item])
+
+
+class MappedModel:
+    """Everything load_snapshot() maps from disk (holding it keeps the mmap alive)."""
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+# ==========================================
+# SAVE
+# ==========================================
+def save_snapshot(model, path):
+    """Writes a model's trie, vocabulary and bigram matrix as a versioned snapshot."""
+    # 1. Re-intern the vocabulary in SORTED order (snapshot id == rank), so a
+    #    mapped vocabulary can find words by Binary Search without a hash table
+    order = sorted(range(len(model.vocab)), key=model.vocab.word)
+    new_ids = array.array('I', bytes(4 * len(order)))
+    for new_id, old_id in enumerate(order):
+        new_ids[old_id] = new_id
+
+    blob = bytearray()
+    vocab_offsets = array.array('Q', [0])
+    for old_id in order:
+        blob += model.vocab.word(old_id).encode("utf-8")
+        vocab_offsets.append(len(blob))
+
+    # 2. Unigram counts + CSR bigram matrix, rows permuted into the new id order
+    #    (rows stay sorted by count desc; ties by id == alphabetical, as in memory)
+    bigrams = model.bigrams
+    unigram_counts = array.array('Q', (bigrams.unigram(old_id) for old_id in order))
+    row_offsets = array.array('Q', [0])
+    successors = array.array('I')
+    counts = array.array('Q')
+    word_order = array.array('I')
+    for old_id in order:
+        row = sorted(((new_ids[w2_id], count) for w2_id, count in bigrams.successors_of(old_id)),
+                     key=lambda x: (-x[1], x[0]))
+        successors.extend(w2_id for w2_id, _ in row)
+        counts.extend(count for _, count in row)
+        word_order.extend(sorted(range(len(row)), key=lambda i: row[i][0]))  # New id order == word order
+        row_offsets.append(len(successors))
+
+    # 3. The array-encoded trie (reused as-is if the model already has one)
+    if model.trie_backend == "compact":
+        trie = model.compact_trie
+    else:
+        trie = CompactTrie(model.vocab.words)
+
+    flags = 0
+    top_offsets = array.array('I')
+    top_ids = array.array('I')
+    if model.top_k is not None:
+        flags |= FLAG_TOP_K
+        if trie.top_offsets is None:
+            trie.build_top_completions(model.top_k, model.unigram_count)
+        top_offsets = array.array('I', trie.top_offsets)
+        top_ids = array.array('I', (new_ids[model.vocab.id(word)] for word in trie.top_words[:]))
+
+    payloads = [
+        bytes(blob), _to_bytes(vocab_offsets), _to_bytes(unigram_counts),
+        _to_bytes(row_offsets), _to_bytes(successors), _to_bytes(counts), _to_bytes(word_order),
+        trie.alphabet.encode("utf-8"), _to_bytes(array.array('I', trie.first_child)),
+        _to_bytes(array.array(_label_typecode(len(trie.alphabet)), trie.labels)),
+        bytes(trie.is_end), _to_bytes(top_offsets), _to_bytes(top_ids),
+    ]
+
+    # 4. Lay the sections out after the header, each 8-byte aligned
+    table_end = _HEADER.size + _SECTION.size * len(payloads)
+    offset = (table_end + 7) & ~7
+    table = []
+    for payload in payloads:
+        table.append((offset, len(payload)))
+        offset = (offset + len(payload) + 7) & ~7
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, SNAPSHOT_VERSION, flags, model.top_k or 0, len(payloads)))
+        for entry in table:
+            f.write(_SECTION.pack(*entry))
+        for (section_offset, _), payload in zip(table, payloads):
+            f.write(b"\x00" * (section_offset - f.tell()))
+            f.write(payload)
+
+
+# ==========================================
+# LOAD
+# ==========================================
+def load_snapshot(path):
+    """Memory-maps a snapshot. Nothing is parsed up front except the header."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, flags, top_k, n_sections = _HEADER.unpack_from(mm, 0)
+    if magic != MAGIC:
+        mm.close()
+        raise ValueError(f"{path} is not an autocomplete snapshot")
+    if version != SNAPSHOT_VERSION or n_sections != len(SECTIONS):
+        mm.close()
+        raise ValueError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+
+    view = memoryview(mm)
+    sections = {}
+    for i, (name, typecode) in enumerate(SECTIONS):
+        offset, length = _SECTION.unpack_from(mm, _HEADER.size + i * _SECTION.size)
+        sections[name] = (view[offset:offset + length], typecode)
+
+    alphabet = str(sections["trie_alphabet"][0], "utf-8")
+    arrays = {}
+    for name, (buffer, typecode) in sections.items():
+        if typecode == 'label':
+            typecode = _label_typecode(len(alphabet))
+        arrays[name] = buffer if typecode is None else _from_buffer(buffer, typecode)
+
+    vocab = MappedVocabulary(arrays["vocab_blob"], arrays["vocab_offsets"])
+    trie = CompactTrie.from_arrays(alphabet, arrays["trie_first_child"],
+                                   arrays["trie_labels"], arrays["trie_is_end"])
+    if flags & FLAG_TOP_K:
+        trie.top_offsets = arrays["top_offsets"]
+        trie.top_words = _IdWordList(arrays["top_ids"], vocab)
+
+    bigrams = BigramMatrix(arrays["unigram_counts"], arrays["bigram_row_offsets"],
+                           arrays["bigram_successors"], arrays["bigram_counts"], arrays["bigram_word_order"])
+
+    return MappedModel(
+        mm=mm,
+        vocab=vocab,
+        bigrams=bigrams,
+        compact_trie=trie,
+        top_k=top_k if flags & FLAG_TOP_K else None,
+    )
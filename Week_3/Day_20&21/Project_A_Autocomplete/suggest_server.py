@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import json
+
+from cli_app import load_engine
+
+# ==========================================
+# THEORY: Event Loop + Request Coalescing
+# ==========================================
+# One asyncio event loop serves every client connection. Instead of answering
+# each request immediately, requests are parked in a batch and flushed on the
+# NEXT loop iteration (loop.call_soon). Everything that arrived in the
+# meantime is answered by ONE engine.suggest_batch() call, where requests that
+# share a prefix share a single trie walk.
+#
+# Protocol: newline-delimited JSON over TCP or a Unix socket.
+#   -> {"id": 1, "context": "machine", "prefix": "le", "k": 3}
+#   <- {"id": 1, "suggestions": [["learning", 0.8], ...]}
+#   -> {"cmd": "stats"}
+#   <- {"stats": {...}}
+
+class SuggestionBatcher:
+    """Collects concurrent suggest() requests and answers them in one batch."""
+    def __init__(self, engine):
+        self.engine = engine
+        self._pending = []        # [(query, future), ...]
+        self._flush_scheduled = False
+
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    def suggest(self, context_word, partial_word, k):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((context_word, partial_word, k), future))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush)
+        return future
+
+    def _flush(self):
+        batch, self._pending = self._pending, []
+        self._flush_scheduled = False
+
+        self.requests += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        try:
+            results = self.engine.suggest_batch([query for query, _ in batch])
+        except Exception:
+            # One bad query must not fail the others: answer each on its own
+            for query, future in batch:
+                if future.done():
+                    continue
+                try:
+                    future.set_result(self.engine.suggest_batch([query])[0])
+                except Exception as exc:
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():  # The client may have disconnected meanwhile
+                future.set_result(result)
+
+    def stats(self):
+        stats = {
+            "requests": self.requests,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "avg_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+        if self.engine.cache is not None:
+            stats["cache"] = self.engine.cache.stats()
+        return stats
+
+
+class SuggestionServer:
+    def __init__(self, engine, default_k=3):
+        self.batcher = SuggestionBatcher(engine)
+        self.default_k = default_k
+        self.clients = 0
+
+    async def _answer(self, line):
+        try:
+            request = json.loads(line)
+            if request.get("cmd") == "stats":
+                return {"stats": self.batcher.stats()}
+            context_word = str(request.get("context", "")).lower()
+            partial_word = str(request.get("prefix", "")).lower()
+            k = request.get("k", self.default_k)
+            if isinstance(k, bool) or not isinstance(k, int) or k < 1:
+                raise ValueError(f"k must be an int >= 1, got {k!r}")
+        except (ValueError, TypeError, AttributeError) as exc:
+            return {"error": f"bad request: {exc}"}
+
+        suggestions = await self.batcher.suggest(context_word, partial_word, k)
+        response = {"suggestions": [[word, prob] for word, prob in suggestions]}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def handle_client(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    response = await self._answer(line)
+                except Exception as exc:  # Only this request fails, never the connection
+                    response = {"error": f"request failed: {exc}"}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+            where = unix_path
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            where = f"{host}:{port}"
+        print(f"Suggestion server listening on {where}")
+        async with server:
+            await server.serve_forever()
+
+# ==========================================
+# EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve AutocompleteEngine.suggest over a socket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--snapshot", help="snapshot file to load (trained + saved if missing)")
+    parser.add_argument("--k", type=int, default=3, help="default number of suggestions")
+    args = parser.parse_args()
+
+    engine = load_engine(args.snapshot)
+    try:
+        asyncio.run(SuggestionServer(engine, default_k=args.k).serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("\nShutting down server... Goodbye!")
@@ -0,0 +1,92 @@
+import collections
+import sys
+import threading
+
+# ==========================================
+# THEORY: LRU (Least Recently Used) Cache
+# ==========================================
+# Typing traffic is heavily skewed: the same (context, prefix) pairs come
+# back again and again. An OrderedDict gives us an O(1) LRU:
+#   * hit   -> move_to_end(key)        (mark as most recently used)
+#   * insert-> append at the end
+#   * evict -> popitem(last=False)     (drop the least recently used)
+# A single lock makes it safe to share between server threads.
+
+class SuggestionCache:
+    """Bounded, thread-safe LRU cache for suggest() results."""
+    def __init__(self, max_entries=None, max_bytes=None):
+        if max_entries is None and max_bytes is None:
+            raise ValueError("SuggestionCache needs max_entries and/or max_bytes")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = collections.OrderedDict()  # key -> (value, size_in_bytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+
+        # Counters for sizing the cache in production
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _estimate_bytes(key, value):
+        """Approximate deep size of one entry (key tuple + result tuples + strings)."""
+        size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+        size += sys.getsizeof(value)
+        for word, prob in value:
+            size += sys.getsizeof((word, prob)) + sys.getsizeof(word) + sys.getsizeof(prob)
+        return size
+
+    def get(self, key):
+        """Returns the cached value, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self._estimate_bytes(key, value) if self.max_bytes is not None else 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+
+            # Evict from the cold end until we are back under budget
+            while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry (called whenever the model changes)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
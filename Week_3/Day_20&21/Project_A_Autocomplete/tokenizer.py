@@ -0,0 +1,139 @@
+# ==========================================
+# THEORY: One-Pass Tokenization straight to Ids
+# ==========================================
+# text.lower().replace('.', '').split() walks (and copies) the text 3 times,
+# then every token is interned with a Python-level call per word.
+# Here:
+#   1. ONE bytes.translate() pass folds the case, deletes punctuation and turns
+#      separators into spaces (a 256-entry lookup table, run in C).
+#   2. split() cuts the tokens.
+#   3. map(token_ids.__getitem__, tokens) interns them in C: token_ids is a
+#      dict from raw token -> id, and only a NEW token reaches Python
+#      (__missing__ decodes it once and adds it to the Vocabulary).
+# Bytes and mmap input skip decoding entirely. The byte table only knows
+# ASCII, so a block containing any other character takes the str path
+# (str.lower() / str.split() understand all of Unicode): both paths always
+# produce exactly the same tokens.
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+# Everything str.split() splits on below 128 (including the \x1c-\x1f separators)
+ASCII_WHITESPACE = bytes(b for b in range(128) if chr(b).isspace())
+
+
+class TokenIds(dict):
+    """Raw token (bytes or str) -> word id, backed by a Vocabulary (see Tokenizer.id_map)."""
+    def __init__(self, vocab):
+        super().__init__()
+        self.vocab = vocab
+
+    def __missing__(self, token):
+        # Bytes tokens only ever come from ASCII blocks
+        word = token.decode("ascii") if isinstance(token, bytes) else token
+        word_id = self[token] = self.vocab.add(word)
+        return word_id
+
+
+class Tokenizer:
+    """
+    Whitespace tokenizer with configurable case and punctuation handling.
+    lowercase:  fold every token to lowercase
+    delete:     characters removed from the text ("e.g." -> "eg")
+    separators: characters treated like whitespace ("well-known" -> "well", "known")
+    Case folding happens first, so 'delete' / 'separators' see lowercase text.
+    """
+    def __init__(self, lowercase=True, delete=".", separators=""):
+        self.lowercase = lowercase
+        self.delete = delete
+        self.separators = separators
+
+        # Byte-level table for the fast path (only possible for ASCII settings)
+        self._byte_table = self._byte_delete = None
+        if (delete + separators).isascii():
+            table = bytearray(range(256))
+            removed = bytearray()
+            for byte in range(128):
+                char = chr(byte).lower() if lowercase else chr(byte)
+                if char in delete:
+                    removed.append(byte)
+                elif char in separators or byte in ASCII_WHITESPACE:
+                    table[byte] = ord(" ")
+                else:
+                    table[byte] = ord(char)
+            self._byte_table, self._byte_delete = bytes(table), bytes(removed)
+
+    def normalize(self, text):
+        """Case + punctuation handling for ONE piece of text (no splitting)."""
+        if self.lowercase:
+            text = text.lower()
+        for char in self.delete:
+            text = text.replace(char, "")
+        for char in self.separators:
+            text = text.replace(char, " ")
+        return text
+
+    def tokens(self, data, encoding="utf-8"):
+        """The list of tokens (str) in 'data' (str, bytes or bytearray)."""
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode(encoding)
+        return self.normalize(data).split()
+
+    def id_map(self, vocab):
+        """A token -> id cache for 'vocab'. Keep ONE per vocabulary and reuse it across blocks."""
+        return TokenIds(vocab)
+
+    def ids(self, data, token_ids, encoding="utf-8"):
+        """
+        The interned word ids of every token in 'data' (str, bytes or bytearray),
+        in order. New words are added to token_ids.vocab.
+        encoding: used to decode non-ASCII bytes (must be ASCII-compatible).
+        """
+        if self._byte_table is not None and data.isascii():
+            if isinstance(data, str):
+                data = data.encode("ascii")
+            raw_tokens = data.translate(self._byte_table, self._byte_delete).split()
+        else:
+            raw_tokens = self.tokens(data, encoding)
+        return list(map(token_ids.__getitem__, raw_tokens))
+
+    def iter_ids(self, data, token_ids, encoding="utf-8", block_size=DEFAULT_BLOCK_SIZE):
+        """Yields the word ids of a (possibly huge) str / bytes / mmap, one block at a time."""
+        for block in iter_blocks(data, block_size):
+            yield from self.ids(block, token_ids, encoding)
+
+
+def iter_blocks(data, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Cuts a str / bytes / mmap into ~block_size pieces that never split a token:
+    every cut is moved back to the last ASCII whitespace of the block (or
+    forward to the next one, for a giant token). Slicing an mmap only pages
+    in (and copies) that one block.
+    """
+    whitespace = ASCII_WHITESPACE.decode("ascii") if isinstance(data, str) else ASCII_WHITESPACE
+    whitespace = [whitespace[i:i + 1] for i in range(len(whitespace))]
+    start, size = 0, len(data)
+    while start < size:
+        end = min(start + block_size, size)
+        if end < size:
+            cut = max(data.rfind(space, start, end) for space in whitespace)
+            if cut < start:
+                found = [i for i in (data.find(space, end) for space in whitespace) if i >= 0]
+                cut = min(found) if found else size - 1
+            end = cut + 1
+        yield data[start:end]
+        start = end
+
+
+if __name__ == "__main__":
+    import string
+
+    from bigram_model import Vocabulary
+
+    text = "The model learns. The MODEL predicts e.g. the next well-known word."
+    for tokenizer in (Tokenizer(), Tokenizer(lowercase=False), Tokenizer(delete=string.punctuation.replace("-", ""),
+                                                                       separators="-")):
+        vocab = Vocabulary()
+        ids = tokenizer.ids(text.encode(), tokenizer.id_map(vocab))
+        print(f"lowercase={tokenizer.lowercase!s:<5} delete={tokenizer.delete!r:<35} "
+              f"separators={tokenizer.separators!r:<4} -> {ids}")
+        print(f"    {[vocab.word(i) for i in ids]}")
@@ -0,0 +1,92 @@
+import argparse
+import random
+import string
+import time
+import tracemalloc
+
+from autocomplete_engine import AutocompleteEngine
+from bigram_model import BigramMatrix, Vocabulary
+from compact_trie import CompactTrie
+from frozen_model import FrozenModel, insert_words
+
+# ==========================================
+# BENCHMARK: TrieNode objects vs. CompactTrie arrays
+# ==========================================
+# Memory is measured with tracemalloc (bytes allocated while building the trie).
+# Latency is measured per prefix lookup (walk + collect all completions).
+
+def generate_vocabulary(size, seed=42):
+    """Random lowercase words (3-12 chars) with a skew towards common first letters."""
+    rng = random.Random(seed)
+    letters = string.ascii_lowercase
+    weights = [1 / (rank + 1) for rank in range(len(letters))]  # Zipf-like letter usage
+    vocab = set()
+    while len(vocab) < size:
+        length = rng.randint(3, 12)
+        vocab.add("".join(rng.choices(letters, weights=weights, k=length)))
+    return sorted(vocab)
+
+def build_model(backend, words):
+    """Builds ONLY the trie of a model (no bigram statistics needed here)."""
+    if backend == "compact":
+        return FrozenModel(Vocabulary(), BigramMatrix(), backend, compact_trie=CompactTrie(words))
+    return FrozenModel(Vocabulary(), BigramMatrix(), backend, root=insert_words(None, words))
+
+def measure_memory(backend, words):
+    tracemalloc.start()
+    model = build_model(backend, words)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model, current
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def measure_latency(model, prefixes):
+    timings = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        model.words_with_prefix(prefix)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "p50": percentile(timings, 50),
+        "p99": percentile(timings, 99),
+        "total": sum(timings),
+    }
+
+# ==========================================
+# EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the node-based and array-based tries.")
+    parser.add_argument("--words", type=int, default=200_000, help="vocabulary size")
+    parser.add_argument("--queries", type=int, default=2_000, help="number of prefix lookups")
+    args = parser.parse_args()
+
+    print(f"Generating {args.words:,} synthetic words...")
+    words = generate_vocabulary(args.words)
+
+    rng = random.Random(7)
+    prefixes = [rng.choice(words)[:rng.randint(2, 4)] for _ in range(args.queries)]
+
+    results = {}
+    for backend in AutocompleteEngine.TRIE_BACKENDS:
+        model, mem_bytes = measure_memory(backend, words)
+        results[backend] = (model, mem_bytes, measure_latency(model, prefixes))
+
+    # Validation: both tries must return exactly the same completions
+    node_model, compact_model = results["node"][0], results["compact"][0]
+    for prefix in prefixes[:200]:
+        assert node_model.words_with_prefix(prefix) == compact_model.words_with_prefix(prefix)
+    print("Success: Both tries returned identical completions.\n")
+
+    print(f"{'Backend':<10} | {'Memory':>12} | {'Bytes/word':>10} | {'p50 lookup':>11} | {'p99 lookup':>11}")
+    print("-" * 66)
+    for backend, (model, mem_bytes, latency) in results.items():
+        print(f"{backend:<10} | {mem_bytes / 1e6:>9.2f} MB | {mem_bytes / len(words):>10.1f} | "
+              f"{latency['p50'] * 1e6:>8.1f} us | {latency['p99'] * 1e6:>8.1f} us")
+
+    ratio = results["node"][1] / results["compact"][1]
+    print(f"\nCompactTrie uses {ratio:.1f}x less memory ({len(results['compact'][0].compact_trie):,} nodes).")